@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Benchmark: cascade on a single berth holding 1k calls
+# Usage: python bench_cascade.py [calls]
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from port_I import BerthMonitor, cascade_sweep, format_date
+
+N_CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+SAFETY_GAP = timedelta(hours=2)
+
+
+def make_berth(n):
+    # Adversarial chain: back-to-back calls exactly one safety gap apart, then the head
+    # is held 24h longer (a drop at the head) -> every call behind it has to move
+    base = datetime(2026, 1, 1)
+    step = timedelta(hours=12) + SAFETY_GAP
+    vessels = [{'eta': base + i * step, 'etd': base + i * step + timedelta(hours=12)} for i in range(n)]
+    vessels[0]['etd'] += timedelta(hours=24)
+    return vessels
+
+
+def legacy_fixpoint(vessels):
+    # Previous resolve_collisions core: adjacent pairs, up to 50 passes
+    vessels.sort(key=lambda x: x['eta'])
+    changed = True
+    loop = 0
+    shifts = 0
+    while changed and loop < 50:
+        changed = False; loop += 1
+        for i in range(len(vessels) - 1):
+            v1, v2 = vessels[i], vessels[i + 1]
+            safe_eta = v1['etd'] + SAFETY_GAP
+            if v2['eta'] < safe_eta:
+                shifts += 1
+                delta = safe_eta - v2['eta']
+                v2['eta'] += delta
+                v2['etd'] += delta
+                v2['접안예정일시'] = format_date(v2['eta'])
+                v2['출항예정일시'] = format_date(v2['etd'])
+                changed = True
+    return loop, shifts
+
+
+def single_sweep(vessels):
+    shifts = cascade_sweep([v['eta'] for v in vessels], [v['etd'] for v in vessels], SAFETY_GAP)
+    moved = 0
+    for v, shift in zip(vessels, shifts):
+        if not shift: continue
+        moved += 1
+        v['eta'] += shift
+        v['etd'] += shift
+        v['접안예정일시'] = format_date(v['eta'])
+        v['출항예정일시'] = format_date(v['etd'])
+    return 1, moved
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def bench_engine():
+    legacy = make_berth(N_CALLS)
+    sweep = make_berth(N_CALLS)
+    t_legacy, (passes, shifts) = timed(legacy_fixpoint, legacy)
+    t_sweep, (sweep_passes, moved) = timed(single_sweep, sweep)
+    assert [v['eta'] for v in legacy] == [v['eta'] for v in sweep], "Engines disagree"
+    checks = passes * (N_CALLS - 1)
+    print(f"[engine]  legacy fixpoint: {t_legacy * 1000:8.1f} ms ({passes} passes, {checks} pair checks, {shifts} shifts)")
+    print(f"[engine]  single sweep   : {t_sweep * 1000:8.1f} ms ({sweep_passes} pass, {N_CALLS - 1} pair checks, {moved} shifts)")
+
+
+def bench_monitor():
+    # End-to-end: drag the first call of a 1k-call berth onto the second one
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = BerthMonitor()
+
+    headers = window.headers
+    base = datetime(2026, 1, 1)
+    rows = ["\t".join(headers)]
+    for i in range(N_CALLS):
+        eta = base + timedelta(hours=i * 14)
+        etd = eta + timedelta(hours=12)
+        rows.append("\t".join([str(i + 1), "PNC", "1", f"BENCH{i}", "001", "2026", f"{i:04d}E",
+                               "HMM", "AE1", "P", format_date(eta), format_date(etd)]))
+    QApplication.clipboard().setText("\n".join(rows))
+    window.paste_data('KRPUS')
+
+    master = window.vessel_items[0]
+    master.setPos(master.pos().x() + 14 * window.pixels_per_hour, master.pos().y())
+    t_move, _ = timed(window.handle_vessel_move, master)
+    shifted = len(window.ports['KRPUS'].slave_log_data)
+    print(f"[monitor] handle_vessel_move: {t_move * 1000:8.1f} ms ({shifted} slaves logged)")
+
+
+if __name__ == "__main__":
+    print(f"Cascade benchmark - {N_CALLS} calls on one berth")
+    bench_engine()
+    bench_monitor()
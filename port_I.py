@@ -1,20 +1,25 @@
 import sys
 import copy
 import json
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
                              QHeaderView, QLabel, QSplitter, QGraphicsView, QGraphicsScene,
-                             QGraphicsRectItem, QGraphicsTextItem, QGraphicsItem, QGraphicsLineItem,
+                             QGraphicsRectItem, QGraphicsTextItem, QGraphicsItem, QGraphicsLineItem, QGraphicsPixmapItem,
                              QDialog, QTabWidget, QCheckBox, QGroupBox, QScrollArea, QFrame,
                              QFileDialog, QHeaderView, QTextEdit, QColorDialog, QRadioButton,
-                             QAbstractItemView)
-from PyQt5.QtGui import QColor, QFont, QBrush, QPen, QPainter, QWheelEvent, QPolygonF, QPainterPath, qGray
+                             QAbstractItemView, QDoubleSpinBox, QButtonGroup, QLineEdit)
+from PyQt5.QtGui import (QColor, QFont, QBrush, QPen, QPainter, QWheelEvent, QPolygonF, QPainterPath, qGray,
+                         QFontMetricsF, QImage, QPixmap, QTransform)
 from PyQt5.QtCore import Qt, QRectF, pyqtSignal, QObject, QTimer, QLineF, QPointF
 import math
 import random
 import re
+import heapq
+import bisect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 
 # pyinstaller -w -F port_i.py
@@ -139,6 +144,23 @@ class ZoomableGraphicsView(QGraphicsView):
         self.zoom_factor = 1.15
 
     def wheelEvent(self, event):
+        # Ctrl + Wheel: Semantic time-scale zoom (re-positions items, fonts stay the same size)
+        if event.modifiers() & Qt.ControlModifier and hasattr(self.scene(), 'parent_view'):
+            parent = self.scene().parent_view
+            old_scale = parent.pixels_per_hour
+            anchor = self.mapToScene(event.pos())
+
+            if event.angleDelta().y() > 0:
+                parent.set_time_scale(old_scale * 1.25)
+            else:
+                parent.set_time_scale(old_scale / 1.25)
+
+            # Keep the hour under the mouse cursor fixed
+            new_x = anchor.x() * parent.pixels_per_hour / old_scale
+            hbar = self.horizontalScrollBar()
+            hbar.setValue(hbar.value() + int((new_x - anchor.x()) * self.transform().m11()))
+            return
+
         # Zoom Logic (Simple relative scaling)
         zoom_in_factor = 1.15
         zoom_out_factor = 1 / zoom_in_factor
@@ -388,87 +410,880 @@ class MemoTickerLabel(TickerLabel):
         # Note: Seamless drawing removed because we have a distinct GAP state now.
         # But for long sequences we might still want it? No, user wants a 3s empty gap.
 
+# --- Schedule Algorithms ---
+def assign_sub_lanes(intervals):
+    """Interval-graph coloring for one berth.
+    intervals: [(start, end), ...] -> (lanes, lane_counts) per interval.
+    Sort by start + min-heap of lane end times, O(n log n). lane_counts is the
+    number of lanes used by the overlap cluster the interval belongs to, so
+    vessels that overlap nothing keep the full row height."""
+    n = len(intervals)
+    lanes = [0] * n
+    lane_counts = [1] * n
+    order = sorted(range(n), key=lambda i: intervals[i][0])
+    
+    busy = []      # (end, lane) of vessels still occupying a lane
+    free = []      # Released lane numbers (smallest first)
+    next_lane = 0
+    cluster = []   # Members of the current overlap cluster
+    cluster_end = None
+    
+    def close_cluster():
+        count = max(lanes[i] for i in cluster) + 1
+        for i in cluster:
+            lane_counts[i] = count
+    
+    for i in order:
+        start, end = intervals[i]
+        if cluster and start >= cluster_end:
+            # Nothing overlaps anymore -> new cluster starts from lane 0
+            close_cluster()
+            cluster = []
+            busy = []; free = []; next_lane = 0
+        
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            lane = heapq.heappop(free)
+        else:
+            lane = next_lane
+            next_lane += 1
+        
+        lanes[i] = lane
+        heapq.heappush(busy, (end, lane))
+        cluster.append(i)
+        cluster_end = end if cluster_end is None or len(cluster) == 1 else max(cluster_end, end)
+    
+    if cluster:
+        close_cluster()
+    return lanes, lane_counts
+
+def berth_heat_row(intervals, start_time, total_hours, gap_h):
+    """Occupancy count and safety-gap violation flag per hour cell of one berth.
+    Difference arrays + one prefix-sum pass -> O(n log n + hours) per row."""
+    occ = [0] * (total_hours + 1)
+    viol = [0] * (total_hours + 1)
+    gap = timedelta(hours=gap_h)
+    
+    def cell(t, round_up=False):
+        h = (t - start_time).total_seconds() / 3600
+        h = math.ceil(h) if round_up else math.floor(h)
+        return max(0, min(total_hours, h))
+    
+    prev_end = None
+    for eta, etd in sorted(intervals):
+        occ[cell(eta)] += 1
+        occ[cell(etd, True)] -= 1
+        
+        # Arrived before the previous vessel left + safety gap -> violation window
+        if prev_end is not None and eta < prev_end + gap:
+            viol[cell(eta)] += 1
+            viol[cell(prev_end + gap, True)] -= 1
+        prev_end = etd if prev_end is None else max(prev_end, etd)
+    
+    occ_row, viol_row = [], []
+    run_occ = run_viol = 0
+    for h in range(total_hours):
+        run_occ += occ[h]; run_viol += viol[h]
+        occ_row.append(run_occ)
+        viol_row.append(run_viol > 0)
+    return occ_row, viol_row
+
+def cascade_sweep(starts, ends, gap):
+    """Single forward sweep over one berth sorted by start.
+    Each call starts no earlier than the previous (shifted) departure + gap.
+    Returns the shift per call. Works for datetime/timedelta and float hours."""
+    shifts = []
+    prev_end = None
+    for start, end in zip(starts, ends):
+        shift = start - start # Zero of the matching type
+        if prev_end is not None and start < prev_end + gap:
+            shift = prev_end + gap - start
+        shifts.append(shift)
+        prev_end = end + shift
+    return shifts
+
+def compaction_sweep(starts, ends, origins, movable, gap):
+    """Inverse of cascade_sweep: one forward pass pulling movable calls back
+    toward their original start, never before the previous departure + gap
+    and never later than where they are now. Returns the (<= 0) shift per call."""
+    shifts = []
+    prev_end = None
+    for start, end, origin, can_move in zip(starts, ends, origins, movable):
+        shift = start - start # Zero of the matching type
+        if can_move and start > origin:
+            target = origin if prev_end is None else max(origin, prev_end + gap)
+            if target < start:
+                shift = target - start
+        shifts.append(shift)
+        prev_end = end + shift if prev_end is None else max(prev_end, end + shift)
+    return shifts
+
+def berth_plan_delay(calls, gap_h):
+    """calls: [(orig_start, duration)] sorted by orig_start, float hours.
+    Each call as early as possible after its original start -> (total delay, starts)"""
+    starts = [c[0] for c in calls]
+    shifts = cascade_sweep(starts, [c[0] + c[1] for c in calls], gap_h)
+    return sum(shifts), [s + sh for s, sh in zip(starts, shifts)]
+
+def optimize_berth_plan(task):
+    """Process-pool worker: berth reassignment plan for one port.
+    task = (calls, berths, gap_h, term_change_h, max_rounds),
+    calls = [(uid, orig_berth, orig_start, duration)] in float hours, orig_* being
+    the original placement or, for user-placed calls, where the user put them.
+    Cost = delay vs orig_start + term_change_h per terminal change.
+    Greedy list scheduling in original-ETA order, then relocate moves; a move
+    is priced by re-sweeping only the two berths it touches."""
+    calls, berths, gap_h, term_change_h, max_rounds = task
+    calls = sorted(calls, key=lambda c: (c[2], c[0]))
+    
+    def penalty(call, berth):
+        if berth.split('-')[0] != call[1].split('-')[0]: return term_change_h
+        return 0 if berth == call[1] else 1e-6 # Tie-break: stay on the original berth
+    
+    # 1. Greedy: each call to the berth where it can start earliest (plus penalty)
+    last_end = {b: None for b in berths}
+    assign = {}
+    for call in calls:
+        uid, _, orig_start, duration = call
+        best = None
+        for b in berths:
+            start = orig_start if last_end[b] is None else max(orig_start, last_end[b] + gap_h)
+            cost = start - orig_start + penalty(call, b)
+            if best is None or cost < best[0]:
+                best = (cost, b, start)
+        assign[uid] = best[1]
+        last_end[best[1]] = best[2] + duration
+    
+    # 2. Local search (relocate one call), incremental per-berth costs
+    members = {b: [] for b in berths}
+    for call in calls:
+        members[assign[call[0]]].append(call) # Stays sorted by original start
+    def delay(b_calls): return berth_plan_delay([(c[2], c[3]) for c in b_calls], gap_h)[0]
+    berth_cost = {b: delay(members[b]) for b in berths}
+    
+    for _ in range(max_rounds):
+        improved = False
+        for call in calls:
+            src = assign[call[0]]
+            without = [c for c in members[src] if c is not call]
+            src_delta = delay(without) - berth_cost[src]
+            best = None
+            for dst in berths:
+                if dst == src: continue
+                with_call = members[dst] + [call]
+                with_call.sort(key=lambda c: (c[2], c[0]))
+                dst_cost = delay(with_call)
+                delta = src_delta + dst_cost - berth_cost[dst] + penalty(call, dst) - penalty(call, src)
+                if delta < -1e-9 and (best is None or delta < best[0]):
+                    best = (delta, dst, with_call, dst_cost)
+            if best:
+                _, dst, with_call, dst_cost = best
+                members[src] = without; berth_cost[src] = delay(without)
+                members[dst] = with_call; berth_cost[dst] = dst_cost
+                assign[call[0]] = dst
+                improved = True
+        if not improved: break
+    
+    plan = []
+    for b in berths:
+        _, starts = berth_plan_delay([(c[2], c[3]) for c in members[b]], gap_h)
+        plan.extend((c[0], b, start) for c, start in zip(members[b], starts))
+    term_changes = sum(1 for c in calls if assign[c[0]].split('-')[0] != c[1].split('-')[0])
+    return {'plan': plan, 'delay': sum(berth_cost.values()), 'term_changes': term_changes}
+
+def evaluate_move_plan(task):
+    """Process-pool worker: apply a what-if plan to a copy of one port's schedule.
+    task = (calls, moves, gap_h, compact), float hours:
+    calls = [(uid, berth, eta, etd, orig_berth, orig_eta, cascade_eta)], moves = {uid: (berth, eta)}.
+    Same steps as a real drop: moved calls keep their duration, every berth they land
+    on is cascaded once, then (compact) the berths they left and landed on are pulled
+    left - only cascade-shifted calls (cascade_eta: ETA before the cascade, else None),
+    back toward cascade_eta."""
+    calls, moves, gap_h, compact = task
+    sched = {}
+    for uid, berth, eta, etd, orig_berth, orig_eta, cascade_eta in calls:
+        sched[uid] = {'uid': uid, 'full_berth': berth, 'eta': eta, 'etd': etd,
+                      'orig_berth': orig_berth, 'orig_eta': orig_eta, 'start_eta': eta, 'cascade_eta': cascade_eta}
+    
+    touched = {} # Berths left, then landed on (compaction order of handle_vessel_move)
+    for uid, (berth, eta) in moves.items():
+        d = sched.get(uid)
+        if d is None: continue
+        touched[d['full_berth']] = None
+        d['etd'] = eta + (d['etd'] - d['eta'])
+        d['eta'] = eta
+        d['full_berth'] = berth
+        d['cascade_eta'] = None # Placed by the plan
+    
+    def berth_calls(berth):
+        return sorted((d for d in sched.values() if d['full_berth'] == berth), key=lambda d: (d['eta'], d['uid']))
+    
+    for berth in {berth for berth, _ in moves.values()}:
+        calls_on = berth_calls(berth)
+        shifts = cascade_sweep([d['eta'] for d in calls_on], [d['etd'] for d in calls_on], gap_h)
+        for d, shift in zip(calls_on, shifts):
+            if shift and d['cascade_eta'] is None and d['uid'] not in moves: d['cascade_eta'] = d['eta']
+            d['eta'] += shift
+            d['etd'] += shift
+    
+    if compact:
+        touched.update((berth, None) for berth, _ in moves.values())
+        for berth in touched:
+            calls_on = berth_calls(berth)
+            shifts = compaction_sweep([d['eta'] for d in calls_on], [d['etd'] for d in calls_on],
+                                      [d['eta'] if d['cascade_eta'] is None else d['cascade_eta'] for d in calls_on],
+                                      [d['cascade_eta'] is not None for d in calls_on], gap_h)
+            for d, shift in zip(calls_on, shifts):
+                d['eta'] += shift
+                d['etd'] += shift
+    
+    return {
+        'total_delay': sum(max(0, d['eta'] - d['orig_eta']) for d in sched.values()),
+        'vessels_shifted': sum(1 for d in sched.values() if d['uid'] not in moves and d['eta'] != d['start_eta']),
+        'terminal_changes': sum(1 for d in sched.values() if d['full_berth'].split('-')[0] != d['orig_berth'].split('-')[0]),
+        'gap_violations': len(find_schedule_conflicts(sched.values(), gap_h)),
+    }
+
+def sample_arrival_delay(rnd, model):
+    """Hours late for one arrival: model = (p_late, mean_h), exponential when late"""
+    p_late, mean_h = model
+    if mean_h <= 0 or rnd.random() >= p_late: return 0.0
+    return rnd.expovariate(1 / mean_h)
+
+def robustness_berth(task):
+    """Process-pool worker: Monte Carlo over one berth.
+    task = (uids, starts, ends, models, gap_h, samples, threshold_h, seed), float hours
+    in plan order. Each sample delays the arrivals and re-runs the cascade in plan
+    order; returns {uid: P(pushed by more than threshold_h)}."""
+    uids, starts, ends, models, gap_h, samples, threshold_h, seed = task
+    rnd = random.Random(seed)
+    durations = [e - s for s, e in zip(starts, ends)]
+    counts = [0] * len(uids)
+    for _ in range(samples):
+        prev_end = None
+        for i, start in enumerate(starts):
+            arrival = start + sample_arrival_delay(rnd, models[i])
+            begin = arrival if prev_end is None else max(arrival, prev_end + gap_h)
+            if begin - arrival > threshold_h: counts[i] += 1
+            prev_end = begin + durations[i]
+    return {uid: c / samples for uid, c in zip(uids, counts)}
+
+QUEUE_WAIT_BIN_H = 0.25 # Histogram resolution of the queue simulation waits
+
+def merge_wait_summary(total, summary):
+    """Add one wait summary {'n', 'sum', 'waiting', 'max', 'hist'} into total (in place)"""
+    total['n'] += summary['n']
+    total['sum'] += summary['sum']
+    total['waiting'] += summary['waiting']
+    total['max'] = max(total['max'], summary['max'])
+    for b, count in summary['hist'].items():
+        total['hist'][b] = total['hist'].get(b, 0) + count
+    return total
+
+def wait_percentile(summary, q):
+    """q-quantile of a wait summary, to histogram bin resolution (bin middle, capped at max)"""
+    rank = int(q * (summary['n'] - 1))
+    seen = summary['n'] - summary['waiting'] # Zero waits come first
+    if rank < seen: return 0.0
+    for b in sorted(summary['hist']):
+        seen += summary['hist'][b]
+        if rank < seen:
+            return min((b + 0.5) * QUEUE_WAIT_BIN_H, summary['max'])
+    return summary['max']
+
+def simulate_berth_queues(task):
+    """Process-pool worker: discrete-event replay of one port's schedule.
+    task = (calls, gap_h, runs, seed), calls = [(berth, eta, duration, model)] in float hours.
+    Each run delays every arrival, then pops arrival / berth-release events off a heap;
+    a vessel arriving at a busy berth waits in that berth's FIFO queue. A berth is
+    released at departure + safety gap. Waits are aggregated here, only the summary
+    goes back: {terminal: {'n', 'sum', 'waiting' (> 0), 'max', 'hist': {bin: count of waits > 0}}}."""
+    calls, gap_h, runs, seed = task
+    RELEASE, ARRIVE = 0, 1 # Release first when both happen at the same time
+    rnd = random.Random(seed)
+    summary = {}
+    
+    def record_wait(term, wait):
+        s = summary.get(term)
+        if s is None:
+            s = summary[term] = {'n': 0, 'sum': 0.0, 'waiting': 0, 'max': 0.0, 'hist': {}}
+        s['n'] += 1
+        s['sum'] += wait
+        if wait > 0:
+            s['waiting'] += 1
+            s['max'] = max(s['max'], wait)
+            b = int(wait / QUEUE_WAIT_BIN_H)
+            s['hist'][b] = s['hist'].get(b, 0) + 1
+    
+    for _ in range(runs):
+        events = [(eta + sample_arrival_delay(rnd, model), ARRIVE, i) for i, (_, eta, _, model) in enumerate(calls)]
+        heapq.heapify(events)
+        busy = set()
+        queues = defaultdict(deque)
+
+        def start_service(now, arrived, i):
+            berth, _, duration, _ = calls[i]
+            busy.add(berth)
+            record_wait(berth.split('-')[0], now - arrived)
+            heapq.heappush(events, (now + duration + gap_h, RELEASE, i))
+        
+        while events:
+            now, kind, i = heapq.heappop(events)
+            berth = calls[i][0]
+            if kind == ARRIVE:
+                if berth in busy:
+                    queues[berth].append((now, i))
+                else:
+                    start_service(now, now, i)
+            else:
+                busy.discard(berth)
+                if queues[berth]:
+                    arrived, j = queues[berth].popleft()
+                    start_service(now, arrived, j)
+    return summary
+
+def rotation_key(name, voyage):
+    """Ship identity across ports: name without spaces / punctuation and the
+    voyage number of the first leg ('0012E/0012W' -> '12')"""
+    ship = re.sub(r'[^0-9A-Z]', '', str(name).upper())
+    leg = str(voyage).split('/')[0].upper()
+    digits = re.sub(r'\D', '', leg)
+    return ship, (digits.lstrip('0') or '0') if digits else re.sub(r'[^0-9A-Z]', '', leg)
+
+def build_rotation_chains(task):
+    """Process-pool worker: hash join of all ports' calls on rotation_key.
+    task = {port code: [(uid, name, voyage, eta)]}. Returns [[(code, uid)]]
+    in ETA order, for ships calling at more than one port."""
+    buckets = defaultdict(list)
+    for code, calls in task.items():
+        for uid, name, voyage, eta in calls:
+            buckets[rotation_key(name, voyage)].append((eta, code, uid))
+    chains = []
+    for calls in buckets.values():
+        if len({code for _, code, _ in calls}) < 2: continue
+        calls.sort()
+        chains.append([(code, uid) for _, code, uid in calls])
+    return chains
+
+def rotation_delays(calls, transit):
+    """Knock-on delay per call of one rotation, calls = [(code, eta, etd)] in order.
+    A call can only start `transit` (timedelta) after the (delayed) previous call
+    left another port."""
+    delays = []
+    prev = None
+    for code, eta, etd in calls:
+        delay = timedelta(0)
+        if prev is not None:
+            prev_code, prev_etd, prev_delay = prev
+            gap = transit if code != prev_code else timedelta(0)
+            ready = prev_etd + prev_delay + gap
+            if ready > eta:
+                delay = ready - eta
+        delays.append(delay)
+        prev = (code, etd, delay)
+    return delays
+
+def find_schedule_conflicts(calls, gap):
+    """Overlaps / safety-gap violations already present in a schedule.
+    calls: data dicts (eta, etd, full_berth, uid). One sorted sweep per berth,
+    each call checked against the one departing latest before it.
+    Returns [(berth, earlier, later, kind, hours)], kind 'OVERLAP' or 'GAP'.
+    Works for datetime/timedelta and float hours."""
+    by_berth = defaultdict(list)
+    for d in calls:
+        by_berth[d['full_berth']].append(d)
+    
+    conflicts = []
+    for berth, berth_calls in by_berth.items():
+        berth_calls.sort(key=lambda d: (d['eta'], d.get('uid', 0)))
+        latest = None
+        for d in berth_calls:
+            if latest is not None and d['eta'] < latest['etd'] + gap:
+                kind = 'OVERLAP' if d['eta'] < latest['etd'] else 'GAP'
+                missing = latest['etd'] + gap - d['eta']
+                hours = missing.total_seconds() / 3600 if isinstance(missing, timedelta) else missing
+                conflicts.append((berth, latest, d, kind, hours))
+            if latest is None or d['etd'] > latest['etd']:
+                latest = d
+    return conflicts
+
+def drop_cost_row(task):
+    """Process-pool worker: total delay (hours) caused by dropping a call of
+    `duration` hours on one berth, for every whole hour of the chart.
+    task = (row, starts, ends, duration, hours, gap_h), floats sorted by start.
+    The baseline cascade is swept once; per hour only the pushed chain is
+    walked - it stops at the first call that lands where it already was."""
+    row, starts, ends, duration, hours, gap_h = task
+    base_starts, base_ends = cascade_baseline(starts, ends, gap_h)
+    
+    costs = []
+    k = 0 # Calls starting at/before h stay in front of the dropped one
+    for h in range(hours):
+        while k < len(starts) and starts[k] <= h: k += 1
+        start, chain = push_chain(starts, ends, base_starts, base_ends, k, h, duration, gap_h)
+        cost = start - h # Dropped call itself pushed back
+        for i, new_start in chain:
+            cost += new_start - base_starts[i]
+        costs.append(cost)
+    return row, costs
+
+def cascade_baseline(starts, ends, gap_h):
+    """Positions after resolving the berth as it is (sorted float hours)"""
+    base = cascade_sweep(starts, ends, gap_h)
+    return [s + sh for s, sh in zip(starts, base)], [e + sh for e, sh in zip(ends, base)]
+
+def push_chain(starts, ends, base_starts, base_ends, k, h, duration, gap_h):
+    """Drop a call of `duration` at h in front of call k.
+    Returns (its own start, [(i, new_start)] of the calls it pushes past their
+    baseline). The walk stops at the first call that keeps its baseline slot -
+    everything after it is unchanged."""
+    start = h if k == 0 else max(h, base_ends[k - 1] + gap_h)
+    prev_end = start + duration
+    chain = []
+    for i in range(k, len(starts)):
+        new_start = max(starts[i], prev_end + gap_h)
+        if new_start <= base_starts[i]: break
+        chain.append((i, new_start))
+        prev_end = new_start + (ends[i] - starts[i])
+    return start, chain
+
+def cascade_sensitivity(starts, ends, gap_h, delays):
+    """Downstream impact of delaying each call of one berth (sorted float hours).
+    On the resolved baseline a delay d of call i pushes call k > i by
+    d - (slack between i and k) while that stays positive. With prefix sums of
+    the slack, one backward pass (one pointer per delay, only moving left) gives
+    [(calls shifted, total hours shifted) per delay] for every call."""
+    n = len(starts)
+    base_starts, base_ends = cascade_baseline(starts, ends, gap_h)
+    slack_before = [0.0] # Slack summed from the first call up to call k
+    for k in range(1, n):
+        slack_before.append(slack_before[-1] + max(0.0, base_starts[k] - base_ends[k - 1] - gap_h))
+    slack_sums = [0.0]   # Prefix sums of slack_before
+    for slack in slack_before:
+        slack_sums.append(slack_sums[-1] + slack)
+    
+    result = [[] for _ in range(n)]
+    last = [n - 1] * len(delays) # Last call still pushed, per delay
+    for i in range(n - 1, -1, -1):
+        for t, d in enumerate(delays):
+            j = last[t]
+            while j > i and slack_before[j] - slack_before[i] >= d:
+                j -= 1
+            last[t] = j
+            count = j - i
+            hours = count * (d + slack_before[i]) - (slack_sums[j + 1] - slack_sums[i + 1])
+            result[i].append((count, hours))
+    return result
+
+class BerthIntervalIndex:
+    """Interval index of one berth: VesselItems sorted by (ETA, uid).
+    Maintained incrementally on moves / resizes / copies (bisect), and answers
+    overlap, neighbor and time-point queries in O(log n + k) using the longest
+    stay on the berth to bound how far back an overlapping call can start."""
+    def __init__(self):
+        self.keys = []       # (eta, uid) sorted
+        self.items = []      # VesselItem, same order as keys
+        self.item_keys = {}  # uid -> key used at insertion (data may change before removal)
+        self.max_duration = timedelta(0)
+        self.version = 0     # Bumped on every change (derived caches compare it)
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def add(self, item):
+        key = (item.data['eta'], item.data['uid'])
+        idx = bisect.bisect_right(self.keys, key)
+        self.keys.insert(idx, key)
+        self.items.insert(idx, item)
+        self.item_keys[item.data['uid']] = key
+        self.max_duration = max(self.max_duration, item.data['etd'] - item.data['eta'])
+        self.version += 1
+    
+    def remove(self, item):
+        key = self.item_keys.pop(item.data['uid'], None)
+        if key is None: return
+        idx = bisect.bisect_left(self.keys, key)
+        if idx < len(self.items) and self.items[idx] is item:
+            self.keys.pop(idx)
+            self.items.pop(idx)
+        self.version += 1
+    
+    def refresh_keys(self):
+        """Re-key after an order-preserving shift (cascade)"""
+        self.keys = [(v.data['eta'], v.data['uid']) for v in self.items]
+        self.item_keys = {v.data['uid']: k for v, k in zip(self.items, self.keys)}
+        self.max_duration = max((v.data['etd'] - v.data['eta'] for v in self.items), default=timedelta(0))
+        self.version += 1
+    
+    def overlapping(self, t0, t1):
+        """Calls with eta < t1 and etd > t0"""
+        lo = bisect.bisect_left(self.keys, (t0 - self.max_duration,))
+        hi = bisect.bisect_left(self.keys, (t1,))
+        return [v for v in self.items[lo:hi] if v.data['etd'] > t0]
+    
+    def at(self, t):
+        """Calls in port at time t (eta <= t <= etd)"""
+        lo = bisect.bisect_left(self.keys, (t - self.max_duration,))
+        hi = bisect.bisect_right(self.keys, (t, math.inf))
+        return [v for v in self.items[lo:hi] if v.data['etd'] >= t]
+    
+    def neighbors(self, t):
+        """(last call arriving at/before t, first call arriving after t)"""
+        idx = bisect.bisect_right(self.keys, (t, math.inf))
+        prev_item = self.items[idx - 1] if idx > 0 else None
+        next_item = self.items[idx] if idx < len(self.items) else None
+        return prev_item, next_item
+    
+    def last_departure(self):
+        """Call with the latest ETD (rightmost end of the berth)"""
+        if not self.items: return None
+        tail = self.overlapping(self.keys[-1][0], datetime.max)
+        rightmost = max(tail, key=lambda v: v.data['etd'], default=None)
+        # Empty tail: the last call has zero length (ETD == ETA) and ends rightmost
+        return rightmost if rightmost is not None else self.items[-1]
+
+class BerthGapIndex:
+    """Free windows of one berth, in hours from the chart start.
+    Window j is [starts[j], ends[j]]: a call fits if it starts and ends inside it
+    (the safety gap is already cut off both sides). A max segment tree over the
+    window lengths finds the first / last window long enough in O(log n)."""
+    def __init__(self, intervals, gap_h):
+        # Merge overlapping calls (sub-lanes) into busy blocks
+        blocks = []
+        for start, end in sorted(intervals):
+            if blocks and start <= blocks[-1][1]:
+                blocks[-1][1] = max(blocks[-1][1], end)
+            else:
+                blocks.append([start, end])
+        
+        self.starts = [-math.inf] + [end + gap_h for _, end in blocks]
+        self.ends = [start - gap_h for start, _ in blocks] + [math.inf]
+        
+        self.size = 1
+        while self.size < len(self.starts): self.size *= 2
+        self.tree = [-math.inf] * (2 * self.size)
+        for j, (start, end) in enumerate(zip(self.starts, self.ends)):
+            self.tree[self.size + j] = end - start
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+    
+    def window_at(self, h):
+        """Index of the window starting at/before h"""
+        return bisect.bisect_right(self.starts, h) - 1
+    
+    def first_window(self, j, need):
+        """Smallest window index >= j with length >= need (-1 if none)"""
+        def descend(node, lo, hi):
+            if hi < j or self.tree[node] < need: return -1
+            if lo == hi: return lo
+            mid = (lo + hi) // 2
+            found = descend(2 * node, lo, mid)
+            return found if found >= 0 else descend(2 * node + 1, mid + 1, hi)
+        return descend(1, 0, self.size - 1)
+    
+    def last_window(self, j, need):
+        """Largest window index <= j with length >= need (-1 if none)"""
+        def descend(node, lo, hi):
+            if lo > j or self.tree[node] < need: return -1
+            if lo == hi: return lo
+            mid = (lo + hi) // 2
+            found = descend(2 * node + 1, mid + 1, hi)
+            return found if found >= 0 else descend(2 * node, lo, mid)
+        return descend(1, 0, self.size - 1)
+    
+    def hour_range(self, j, duration):
+        """Whole-hour starts that fit window j: (first, last) or None"""
+        lo = self.starts[j] if math.isinf(self.starts[j]) else math.ceil(self.starts[j] - 1e-9)
+        hi = self.ends[j] - duration
+        hi = hi if math.isinf(hi) else math.floor(hi + 1e-9)
+        return (lo, hi) if lo <= hi else None
+    
+    def first_fit(self, duration, not_before):
+        """Earliest whole-hour start >= not_before for a call of `duration` hours"""
+        j = self.first_window(self.window_at(not_before), duration)
+        while j >= 0:
+            fit = self.hour_range(j, duration)
+            if fit:
+                start = max(fit[0], math.ceil(not_before - 1e-9))
+                if start <= fit[1]: return start, j
+            j = self.first_window(j + 1, duration)
+        return None
+    
+    def nearest_fit(self, h, duration):
+        """Whole-hour start closest to h that would not need a cascade"""
+        best = None
+        j = self.window_at(h)
+        # Nearest window on the right, then on the left (incl. the one starting at/before h)
+        right = self.first_window(j + 1, duration)
+        while right >= 0 and not self.hour_range(right, duration):
+            right = self.first_window(right + 1, duration)
+        left = self.last_window(j, duration)
+        while left >= 0 and not self.hour_range(left, duration):
+            left = self.last_window(left - 1, duration)
+        for k in (right, left):
+            if k < 0: continue
+            lo, hi = self.hour_range(k, duration)
+            start = min(max(round(h), lo), hi)
+            if best is None or abs(start - h) < abs(best - h):
+                best = start
+        return best
+
 # --- Graphic Items ---
-class ArrowItem(QGraphicsLineItem):
-    def __init__(self, start_pos, end_pos, color, parent=None):
-        super().__init__(QLineF(start_pos, end_pos), parent)
-        self.color = color
-        self.setPen(QPen(color, 3, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
-        self.setZValue(100)
-        self.setData(0, "ARROW")
-        self.arrow_head = QPolygonF()
-        self.update_head()
-
-    def update_head(self):
-        line = self.line()
-        
-        arrow_size = 7.5 # Reduced by 50% from 15
-        arrow_angle = math.pi / 6 # 30 degrees
-        
-        # Calculate angle of the line
-        angle = math.atan2(line.y1() - line.y2(), line.x1() - line.x2())
-
-        p1 = line.p2() + QPointF(math.cos(angle + arrow_angle) * arrow_size,
-                                 math.sin(angle + arrow_angle) * arrow_size)
-        p2 = line.p2() + QPointF(math.cos(angle - arrow_angle) * arrow_size,
-                                 math.sin(angle - arrow_angle) * arrow_size)
-                                 
-        self.arrow_head = QPolygonF([line.p2(), p1, p2])
+class HeatmapOverlayItem(QGraphicsPixmapItem):
+    """Berth x hour overlay rendered as ONE image: 1 pixel per cell, scaled to
+    pixels_per_hour x row_height. Rows are kept as raw ARGB32 bytes so a move
+    only patches the rows of the berths it touched."""
+    def __init__(self, row_count, hours, parent=None):
+        super().__init__(parent)
+        self.hours = max(1, hours)
+        self.rows = [bytes(self.hours * 4)] * row_count # Transparent
+        self.dirty_rows = set() # Rows patched since the last render
+        self.setTransformationMode(Qt.FastTransformation) # Crisp cells
+        self.setZValue(-10) # Above row background, below grid & vessels
+        self.setAcceptedMouseButtons(Qt.NoButton)
+    
+    @staticmethod
+    def pack_row(cells, palette):
+        """cells: palette keys per hour -> ARGB32 (little-endian BGRA) row bytes"""
+        return b''.join(palette[c] for c in cells)
+    
+    @staticmethod
+    def bgra(color):
+        return bytes((color.blue(), color.green(), color.red(), color.alpha()))
+    
+    def set_row(self, idx, row_bytes):
+        if 0 <= idx < len(self.rows) and self.rows[idx] != row_bytes:
+            self.rows[idx] = row_bytes
+            self.dirty_rows.add(idx)
+    
+    def render(self):
+        """First call builds the whole image, later calls paint only the dirty row strips"""
+        if not self.rows: return
+        pixmap = self.pixmap()
+        if pixmap.isNull():
+            buf = b''.join(self.rows)
+            image = QImage(buf, self.hours, len(self.rows), self.hours * 4, QImage.Format_ARGB32).copy()
+            self.setPixmap(QPixmap.fromImage(image))
+        elif self.dirty_rows:
+            self.setPixmap(QPixmap()) # Drop the item's reference so painting does not detach (copy) the pixmap
+            painter = QPainter(pixmap)
+            painter.setCompositionMode(QPainter.CompositionMode_Source) # Replace pixels, alpha included
+            for idx in self.dirty_rows:
+                strip = QImage(self.rows[idx], self.hours, 1, self.hours * 4, QImage.Format_ARGB32)
+                painter.drawImage(0, idx, strip)
+            painter.end()
+            self.setPixmap(pixmap)
+        self.dirty_rows.clear()
+    
+    def set_cell_size(self, pixels_per_hour, row_height):
+        self.setTransform(QTransform.fromScale(pixels_per_hour, row_height))
+
+def ts_status_color(a_eta, a_etd, b_eta, b_etd):
+    """TS arrow color, A = discharging vessel, B = loading vessel.
+    Green: the stays overlap (direct transfer), blue: A left before B arrived
+    (cargo waits in the yard), red: A arrived after B left (infeasible)."""
+    if a_eta <= b_etd and a_etd >= b_eta:
+        return QColor("#00ff00")
+    if a_etd < b_eta:
+        return QColor("#0088ff")
+    return QColor("#ff0000")
+
+def ts_color_priority(color):
+    """TS table order inside a load vessel: red -> green -> blue"""
+    return {"#ff0000": 0, "#00ff00": 1, "#0088ff": 2}.get(color.name().lower(), 3)
+
+def interval_join(left, right):
+    """Sort-merge join of two interval lists [(start, end, key)] (closed intervals).
+    Both sides are swept by start; each side keeps its open intervals in a heap
+    by end, so expired ones drop out before the next start is matched.
+    Returns [(left_key, right_key)] for every intersecting pair."""
+    events = sorted([(s, 0, e, k) for s, e, k in left] + [(s, 1, e, k) for s, e, k in right],
+                    key=lambda ev: (ev[0], ev[1]))
+    open_ivs = ([], []) # Heaps of (end, seq, key) per side
+    pairs = []
+    for seq, (start, side, end, key) in enumerate(events):
+        other = open_ivs[1 - side]
+        while other and other[0][0] < start:
+            heapq.heappop(other)
+        for _, _, other_key in other:
+            pairs.append((key, other_key) if side == 0 else (other_key, key))
+        heapq.heappush(open_ivs[side], (end, seq, key))
+    return pairs
+
+def find_ts_pairs(discharging, loading, rules, dwell, transit=timedelta(0)):
+    """Feasible transshipment pairs for line / route pairing rules.
+    discharging / loading: data dicts, rules: [(disch_key, load_key)] where a key
+    matches the route or the line ('*' = any). A pair is feasible when the loading
+    vessel departs after the discharging one arrived and arrives within `dwell`
+    of its departure - an interval join of [eta, etd + dwell] with [eta, etd].
+    `transit` delays the discharged cargo (loading vessel in another port).
+    Returns {(disch_uid, load_uid)}."""
+    def matches(d, key):
+        return key == '*' or d.get('항로') == key or d.get('선사') == key
+    
+    by_uid = {d['uid']: d for d in discharging}
+    by_uid.update((d['uid'], d) for d in loading)
+    pairs = set()
+    for disch_key, load_key in rules:
+        left = [(d['eta'] + transit, d['etd'] + transit + dwell, d['uid']) for d in discharging if matches(d, disch_key)]
+        right = [(d['eta'], d['etd'], d['uid']) for d in loading if matches(d, load_key)]
+        for a, b in interval_join(left, right):
+            if by_uid[a]['모선명'] != by_uid[b]['모선명']: # A vessel does not transship to itself
+                pairs.add((a, b))
+    return pairs
+
+class EdgeLayerItem(QGraphicsItem):
+    """Single scene item that paints every vessel-to-vessel edge:
+    TS arrows, copy links (pink) and duplicate links (lavender).
+    Edges are keyed by vessel identity (data['uid']) and resolved through the
+    uid -> VesselItem map, so a move only recomputes the edges of that vessel."""
+    
+    # kind -> (pen color, pen style, label color)
+    LINK_STYLES = {
+        'COPY': ("#ff69b4", Qt.SolidLine, "#ff0000"), # Pink line, red time gap
+        'DUP': ("#bfabff", Qt.DashLine, "#bfabff"),   # Lavender dashed (duplicates)
+    }
+    
+    def __init__(self, item_map, parent=None):
+        super().__init__(parent)
+        self.item_map = item_map                  # uid -> VesselItem
+        self.edges = {}                           # edge_id -> (kind, src_uid, dst_uid, color)
+        self.vessel_edges = defaultdict(set)      # uid -> {edge_id}
+        self.geometry = {}                        # edge_id -> (QLineF, arrow_head, label, label_rect)
+        self.next_edge_id = 0
+        self.bounds = QRectF()
+        self.label_font = QFont("Segoe UI", 18, QFont.Bold) # 2x larger font
+        self.label_metrics = QFontMetricsF(self.label_font)
+        self.setZValue(50)  # Above vessels
+    
+    def add_edge(self, kind, src_uid, dst_uid, color=None):
+        edge_id = self.next_edge_id
+        self.next_edge_id += 1
+        self.edges[edge_id] = (kind, src_uid, dst_uid, color)
+        self.vessel_edges[src_uid].add(edge_id)
+        self.vessel_edges[dst_uid].add(edge_id)
+        self._recompute([edge_id])
+        return edge_id
+    
+    def add_edges(self, kind, edges):
+        """Bulk add [(src_uid, dst_uid, color)] with a single geometry pass"""
+        edge_ids = []
+        for src_uid, dst_uid, color in edges:
+            edge_id = self.next_edge_id
+            self.next_edge_id += 1
+            self.edges[edge_id] = (kind, src_uid, dst_uid, color)
+            self.vessel_edges[src_uid].add(edge_id)
+            self.vessel_edges[dst_uid].add(edge_id)
+            edge_ids.append(edge_id)
+        self._recompute(edge_ids)
+
+    def set_edge_color(self, kind, src_uid, dst_uid, color):
+        """Recolor the edge(s) of one kind from src to dst and recompute their geometry"""
+        edge_ids = [e for e in self.vessel_edges.get(src_uid, ()) if self.edges[e][:3] == (kind, src_uid, dst_uid)]
+        for edge_id in edge_ids:
+            self.edges[edge_id] = (kind, src_uid, dst_uid, color)
+        self._recompute(edge_ids)
+
+    def remove_edge_between(self, kind, src_uid, dst_uid):
+        """Remove the edge(s) of one kind from src to dst"""
+        for edge_id in [e for e in self.vessel_edges.get(src_uid, ()) if self.edges[e][:3] == (kind, src_uid, dst_uid)]:
+            self.edges.pop(edge_id)
+            self.vessel_edges[src_uid].discard(edge_id)
+            self.vessel_edges[dst_uid].discard(edge_id)
+            self.geometry.pop(edge_id, None)
+        self.update()
 
+    def remove_edges(self, kind=None):
+        """Remove all edges (or all edges of one kind)"""
+        for edge_id in [e for e, edge in self.edges.items() if kind is None or edge[0] == kind]:
+            _, src_uid, dst_uid, _ = self.edges.pop(edge_id)
+            self.vessel_edges[src_uid].discard(edge_id)
+            self.vessel_edges[dst_uid].discard(edge_id)
+            self.geometry.pop(edge_id, None)
+        self.refresh_all()
+    
+    def refresh_vessel(self, uid):
+        """Recompute only the edges touching this vessel"""
+        if self.vessel_edges.get(uid):
+            self._recompute(self.vessel_edges[uid])
+    
+    def refresh_all(self):
+        self.prepareGeometryChange()
+        self.bounds = QRectF()
+        self._recompute(list(self.edges.keys()))
+    
+    def _recompute(self, edge_ids):
+        grown = QRectF(self.bounds)
+        for edge_id in edge_ids:
+            geom = self._edge_geometry(*self.edges[edge_id])
+            if geom is None:
+                self.geometry.pop(edge_id, None)
+                continue
+            self.geometry[edge_id] = geom
+            line, head, _, label_rect = geom
+            rect = QRectF(line.p1(), line.p2()).normalized().adjusted(-10, -10, 10, 10)
+            if label_rect is not None:
+                rect = rect.united(label_rect)
+            grown = grown.united(rect)
+        
+        if grown != self.bounds:
+            self.prepareGeometryChange()
+            self.bounds = grown
+        self.update()
+    
+    def _edge_geometry(self, kind, src_uid, dst_uid, color):
+        src = self.item_map.get(src_uid)
+        dst = self.item_map.get(dst_uid)
+        if src is None or dst is None: return None # Filtered out / not materialized
+        
+        if kind == 'TS':
+            # Center to center arrow (Disch -> Load)
+            line = QLineF(src.mapToScene(src.rect().center()), dst.mapToScene(dst.rect().center()))
+            
+            arrow_size = 7.5 # Reduced by 50% from 15
+            arrow_angle = math.pi / 6 # 30 degrees
+            angle = math.atan2(line.y1() - line.y2(), line.x1() - line.x2())
+            p1 = line.p2() + QPointF(math.cos(angle + arrow_angle) * arrow_size,
+                                     math.sin(angle + arrow_angle) * arrow_size)
+            p2 = line.p2() + QPointF(math.cos(angle - arrow_angle) * arrow_size,
+                                     math.sin(angle - arrow_angle) * arrow_size)
+            return (line, QPolygonF([line.p2(), p1, p2]), None, None)
+        
+        # Links: ETD point of src (right edge, center) -> ETA point of dst (left edge, center)
+        src_pos, dst_pos = src.pos(), dst.pos()
+        etd_point = QPointF(src_pos.x() + src.rect().width(), src_pos.y() + src.rect().height() / 2)
+        eta_point = QPointF(dst_pos.x(), dst_pos.y() + dst.rect().height() / 2)
+        line = QLineF(etd_point, eta_point)
+        
+        # Time gap label, to the LEFT of the line midpoint to avoid overlap
+        label = format_time_delta(dst.data['eta'] - src.data['etd'])
+        label_w = self.label_metrics.horizontalAdvance(label) + 8
+        label_h = self.label_metrics.height()
+        mid = line.center()
+        label_rect = QRectF(mid.x() - label_w - 10, mid.y() - label_h / 2, label_w, label_h)
+        return (line, None, label, label_rect)
+    
+    def boundingRect(self):
+        return self.bounds
+    
     def paint(self, painter, option, widget=None):
-        super().paint(painter, option, widget)
-        painter.setBrush(QBrush(self.color))
-        painter.drawPolygon(self.arrow_head)
-
-class ConnectionLineItem(QGraphicsLineItem):
-    """Pink line connecting original vessel's ETD to copy vessel's ETA with time gap label"""
-    def __init__(self, original_vessel, copy_vessel, parent=None):
-        super().__init__(parent)
-        self.original_vessel = original_vessel
-        self.copy_vessel = copy_vessel
-        self.setPen(QPen(QColor("#ff69b4"), 3, Qt.SolidLine))  # Pink line
-        self.setZValue(50)  # Above vessels but below arrows
-        
-        # Text label for time gap
-        self.label = QGraphicsTextItem("", self)
-        self.label.setDefaultTextColor(QColor("#ff0000")) # Red text for time gap
-        self.label.setFont(QFont("Segoe UI", 18, QFont.Bold))  # 2x larger font
-        
-        self.update_line()
-    
-    def update_line(self):
-        """Update line position and time gap label"""
-        # Get ETD point of original (right edge, center)
-        orig_rect = self.original_vessel.rect()
-        orig_pos = self.original_vessel.pos()
-        etd_point = QPointF(
-            orig_pos.x() + orig_rect.width(),
-            orig_pos.y() + orig_rect.height() / 2
-        )
-        
-        # Get ETA point of copy (left edge, center)
-        copy_rect = self.copy_vessel.rect()
-        copy_pos = self.copy_vessel.pos()
-        eta_point = QPointF(
-            copy_pos.x(),
-            copy_pos.y() + copy_rect.height() / 2
-        )
-        
-        # Update line
-        self.setLine(QLineF(etd_point, eta_point))
-        
-        # Calculate time gap
-        time_gap = self.copy_vessel.data['eta'] - self.original_vessel.data['etd']
-        gap_str = format_time_delta(time_gap)
-        
-        # Update label position (midpoint of line)
-        mid_x = (etd_point.x() + eta_point.x()) / 2
-        mid_y = (etd_point.y() + eta_point.y()) / 2
-        
-        self.label.setPlainText(gap_str)
-        label_rect = self.label.boundingRect()
-        # Position label to the LEFT of the line to avoid overlap
-        self.label.setPos(mid_x - label_rect.width() - 10, mid_y - label_rect.height() / 2)
+        painter.setFont(self.label_font)
+        for edge_id, (line, head, label, label_rect) in self.geometry.items():
+            kind, _, _, color = self.edges[edge_id]
+            
+            if kind == 'TS':
+                painter.setPen(QPen(color, 3, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+                painter.drawLine(line)
+                painter.setBrush(QBrush(color))
+                painter.drawPolygon(head)
+                continue
+            
+            line_color, line_style, label_color = self.LINK_STYLES[kind]
+            painter.setPen(QPen(QColor(line_color), 3, line_style))
+            painter.drawLine(line)
+            painter.setPen(QColor(label_color))
+            painter.drawText(label_rect, Qt.AlignCenter, label)
 
 class VesselItem(QGraphicsRectItem):
     def __init__(self, data, x_pos, y_pos, width, height, color):
@@ -489,8 +1304,6 @@ class VesselItem(QGraphicsRectItem):
         self.copy_label = None  # None, "1st", or "2nd"
         self.copy_border_color = None  # None, QColor for border
         self.linked_vessel = None  # Reference to paired vessel (for copy feature)
-        self.connection_line = None  # Reference to ConnectionLineItem
-        self.is_dragging_for_connection = False  # Flag to prevent itemChange updates during drag
         
         # Highlight Mode
         self.is_highlighted = False
@@ -512,6 +1325,12 @@ class VesselItem(QGraphicsRectItem):
         # IN PORT Highlight
         self.is_in_port = False
         
+        # Monte Carlo badge: P(pushed > threshold) or None
+        self.robustness = None
+        
+        # Cascade sensitivity overlay color or None
+        self.sensitivity_color = None
+        
         # Calculate Complementary Color for text contrast
         comp_color = QColor(255 - color.red(), 255 - color.green(), 255 - color.blue())
         
@@ -593,6 +1412,10 @@ class VesselItem(QGraphicsRectItem):
         
         painter.restore()
         
+        # Cascade sensitivity overlay (tint over the whole bar)
+        if self.sensitivity_color is not None:
+            painter.fillRect(self.rect(), self.sensitivity_color)
+        
         # Draw copy label if set (yellow text on purple background)
         if self.copy_label:
             # Draw purple background rectangle
@@ -681,16 +1504,42 @@ class VesselItem(QGraphicsRectItem):
             
             painter.restore()
 
+        # Draw Robustness Badge (bottom center): green < 10%, orange < 30%, red
+        if self.robustness is not None:
+            badge_rect = QRectF(self.rect().width() / 2 - 18, self.rect().height() - 16, 36, 14)
+            p = self.robustness
+            painter.fillRect(badge_rect, QColor("#50fa7b" if p < 0.1 else ("#ffb86c" if p < 0.3 else "#ff5555")))
+            painter.setPen(QColor("#000000"))
+            painter.setFont(QFont("Segoe UI", 8, QFont.Bold))
+            painter.drawText(badge_rect, Qt.AlignCenter, f"{p:.0%}")
+
     def update_time_labels(self):
         self.eta_text.setPlainText(str(self.data['eta'].hour))
         self.etd_text.setPlainText(str(self.data['etd'].hour))
         etd_w = self.etd_text.boundingRect().width()
         self.etd_text.setPos(self.rect().width() - etd_w - 2, self.rect().height() - 15)
-        
+
         # Center the main text again
         t_rect = self.text.boundingRect()
         self.text.setPos((self.rect().width() - t_rect.width()) / 2, (self.rect().height() - t_rect.height()) / 2)
 
+    def apply_lane_geometry(self, y, height):
+        """Place the vessel in its sub-lane (y / height within the berth row)"""
+        if self.pos().y() == y and self.rect().height() == height: return
+        self.setRect(0, 0, self.rect().width(), height)
+        self.setPos(self.pos().x(), y)
+        self.update_time_labels()
+        self.refresh_edges()
+
+    def apply_time_scale(self, start_time, pixels_per_hour):
+        """Re-position/re-size from ETA/ETD for a new time scale (font sizes untouched)"""
+        x = (self.data['eta'] - start_time).total_seconds() / 3600 * pixels_per_hour
+        width = (self.data['etd'] - self.data['eta']).total_seconds() / 3600 * pixels_per_hour
+        self.setRect(0, 0, width, self.rect().height())
+        self.text.setTextWidth(width)
+        self.update_time_labels()
+        self.setPos(x, self.pos().y()) # -> itemChange refreshes edges
+
     def update_neon(self):
         self.neon_hue = (self.neon_hue + 10) % 360
         color = QColor.fromHsv(self.neon_hue, 255, 255)
@@ -746,18 +1595,17 @@ class VesselItem(QGraphicsRectItem):
             # Create a duplicate vessel
             import copy
             new_data = copy.deepcopy(self.data)
+            if hasattr(self.scene(), 'parent_view'):
+                new_data['uid'] = self.scene().parent_view.new_vessel_uid() # Copy is a new identity
             
-            # Find the rightmost vessel in the same berth
-            same_berth_vessels = []
+            # Find the rightmost vessel in the same berth (interval index)
+            rightmost = None
             if hasattr(self.scene(), 'parent_view'):
-                same_berth_vessels = [
-                    v for v in self.scene().parent_view.vessel_items 
-                    if v.data['full_berth'] == self.data['full_berth']
-                ]
+                rightmost = self.scene().parent_view.berth_index[self.data['full_berth']].last_departure()
             
             # Calculate position: rightmost end of same berth
-            if same_berth_vessels:
-                rightmost_x = max(v.pos().x() + v.rect().width() for v in same_berth_vessels)
+            if rightmost is not None:
+                rightmost_x = rightmost.pos().x() + rightmost.rect().width()
                 new_x = rightmost_x + 10  # Small gap after rightmost vessel
             else:
                 new_x = self.pos().x()
@@ -791,9 +1639,6 @@ class VesselItem(QGraphicsRectItem):
                 # Also update texts on the item itself so it shows correct times initially
                 new_vessel.update_time_labels()
             
-            # Set z-value slightly higher so copy is visible on top
-            new_vessel.setZValue(self.zValue() + 1)
-            
             # Mark original as 1st (red border)
             self.copy_label = "1st"
             self.copy_border_color = QColor("#ff0000")
@@ -808,17 +1653,27 @@ class VesselItem(QGraphicsRectItem):
             self.linked_vessel = new_vessel
             new_vessel.linked_vessel = self
             
-            # Create connection line
-            connection = ConnectionLineItem(self, new_vessel)
-            self.connection_line = connection
-            new_vessel.connection_line = connection
-            
             # Add to scene and data list
             self.scene().addItem(new_vessel)
-            self.scene().addItem(connection)
             if hasattr(self.scene(), 'parent_view'):
-                self.scene().parent_view.vessel_items.append(new_vessel)
-                self.scene().parent_view.vessel_data_list.append(new_data)
+                parent_view = self.scene().parent_view
+                parent_view.vessel_items.append(new_vessel)
+                parent_view.vessel_item_map[new_data['uid']] = new_vessel
+                parent_view.berth_index[new_data['full_berth']].add(new_vessel)
+                parent_view.vessel_data_list.append(new_data)
+                # The copy is compared against its source's original (logs),
+                # its delay against where it was placed
+                port = parent_view.ports[parent_view.active_port_code]
+                orig = parent_view.get_original_data(self.data)
+                if orig is not None:
+                    port.original_index[new_data['uid']] = orig
+                port.user_placed.add(new_data['uid'])
+                parent_view.pack_berth_lanes([new_data['full_berth']])
+                parent_view.update_heatmap_rows([new_data['full_berth']])
+                
+                # Create connection line (Edge Layer)
+                if parent_view.edge_layer:
+                    parent_view.edge_layer.add_edge('COPY', self.data['uid'], new_data['uid'])
             
             return # Block move
             
@@ -844,6 +1699,10 @@ class VesselItem(QGraphicsRectItem):
         else:
             self.resizing = None
             self.has_moved_during_drag = False # Reset drag tracker
+            self.press_scene_pos = event.scenePos()
+            self.drop_cost_started = False # Started once the press turns into a drag
+            if hasattr(self.scene(), 'parent_view'):
+                self.scene().parent_view.set_picked_vessel(self)
             super().mousePressEvent(event)
 
     def mouseMoveEvent(self, event):
@@ -876,9 +1735,17 @@ class VesselItem(QGraphicsRectItem):
                      self.setRect(0, 0, new_width, self.rect().height())
             
             self.update_time_labels()
+            self.refresh_edges()
         else:
             self.has_moved_during_drag = True # Mark as dragged
             
+            # Drop-cost jobs only for a real drag (a plain click / select submits nothing).
+            # Before the ETA update below: the jobs take the call's duration from eta/etd.
+            if (hasattr(scene, 'parent_view') and not getattr(self, 'drop_cost_started', True)
+                    and (event.scenePos() - self.press_scene_pos).manhattanLength() >= QApplication.startDragDistance()):
+                self.drop_cost_started = True
+                scene.parent_view.start_drop_cost(self)
+            
             # UPDATE: Temporarily update ETA during drag for real-time connection line
             if hasattr(scene, 'parent_view'):
                 parent_view = scene.parent_view
@@ -887,25 +1754,15 @@ class VesselItem(QGraphicsRectItem):
                 hours_from_start = current_scene_x / parent_view.pixels_per_hour
                 temp_eta = parent_view.start_time + timedelta(hours=hours_from_start)
                 
-                # Set flag to prevent itemChange from updating
-                self.is_dragging_for_connection = True
-                
                 # Temporarily update data for connection line calculation
-                # Don't restore it - let it stay until after itemChange
+                # Don't restore it - handle_vessel_move sets the final value on release
                 self.data['eta'] = temp_eta
-                
-                # Update connection line if it exists
-                if self.connection_line:
-                    self.connection_line.update_line()
-                    # Explicitly trigger repaint
-                    self.connection_line.update()
-                    self.connection_line.label.update()
             
+            # Moves the item -> itemChange refreshes its edges
             super().mouseMoveEvent(event)
-            
-            # Reset flag AFTER super() completes
-            if hasattr(scene, 'parent_view') and self.connection_line:
-                self.is_dragging_for_connection = False
+            if hasattr(scene, 'parent_view'):
+                scene.parent_view.update_drag_snap(self)
+                scene.parent_view.request_cascade_preview(self)
 
     def mouseReleaseEvent(self, event):
         scene = self.scene()
@@ -923,43 +1780,22 @@ class VesselItem(QGraphicsRectItem):
                 
                 # Check drop target
                 end_pos = self.mapToScene(event.pos())
-                items = self.scene().items(end_pos)
                 target = None
-                for item in items:
-                    if isinstance(item, VesselItem) and item != self:
-                        target = item
-                        break
+                if hasattr(self.scene(), 'parent_view'):
+                    target = self.scene().parent_view.vessel_at(end_pos, exclude=self)
                 
                 if target:
-                    # Logic for Color
-                    # A = self (Source), B = target (Dest)
-                    a_eta = self.data['eta']
-                    a_etd = self.data['etd']
-                    b_eta = target.data['eta']
-                    b_etd = target.data['etd']
+                    # Color: A = self (Source), B = target (Dest)
+                    arrow_color = ts_status_color(self.data['eta'], self.data['etd'],
+                                                  target.data['eta'], target.data['etd'])
                     
-                    arrow_color = QColor("#ff0000") # Default Red
-                    
-                    # 1. A's ETA or ETD is within B's window -> Green
-                    if (b_eta <= a_eta <= b_etd) or (b_eta <= a_etd <= b_etd):
-                        arrow_color = QColor("#00ff00") # Green
-                    # 2. A left before B arrived -> Blue
-                    elif a_etd < b_eta:
-                        arrow_color = QColor("#0088ff") # Blue
-                    # 3. A arrived after B left -> Red
-                    elif a_eta > b_etd:
-                        arrow_color = QColor("#ff0000") # Red
-                    
-                    # Draw permanent arrow
-                    p1 = self.mapToScene(self.rect().center())
-                    p2 = target.mapToScene(target.rect().center())
-                    arrow = ArrowItem(p1, p2, arrow_color)
-                    self.scene().addItem(arrow)
-                    
-                    # Add to TS Table
+                    # Draw permanent arrow (Edge Layer) & Add to TS Table
                     # Drop Target = LOAD VESSEL, Self = DISCH VESSEL
                     if hasattr(self.scene(), 'parent_view'):
-                        self.scene().parent_view.add_ts_connection(target, self, arrow_color)
+                        parent_view = self.scene().parent_view
+                        if parent_view.edge_layer:
+                            parent_view.edge_layer.add_edge('TS', self.data['uid'], target.data['uid'], arrow_color)
+                        parent_view.add_ts_connection(target, self, arrow_color)
             return
 
         if self.resizing:
@@ -969,32 +1805,162 @@ class VesselItem(QGraphicsRectItem):
         else:
             super().mouseReleaseEvent(event)
             if hasattr(self.scene(), 'parent_view'):
+                self.scene().parent_view.end_drag_snap(self)
+                self.scene().parent_view.clear_drop_cost()
+                self.scene().parent_view.clear_cascade_preview()
                 self.scene().parent_view.handle_vessel_move(self)
     
+    def refresh_edges(self):
+        """Recompute the Edge Layer edges (TS arrows, links) touching this vessel"""
+        edge_layer = getattr(self.scene(), 'edge_layer', None) if self.scene() else None
+        if edge_layer:
+            edge_layer.refresh_vessel(self.data.get('uid'))
+    
     def itemChange(self, change, value):
-        """Override to update connection line when vessel moves"""
+        """Override to update connection lines / arrows when vessel moves"""
         if change == QGraphicsItem.ItemPositionHasChanged:
-            # Update connection line if it exists (but not during drag)
-            if self.connection_line and not self.is_dragging_for_connection:
-                self.connection_line.update_line()
+            self.refresh_edges()
         return super().itemChange(change, value)
 
 # --- Port Data Structure ---
+class ChangeLogStore(QObject):
+    """Ordered change log keyed by log_key ("Name|Voyage").
+    An update keeps the row in place, a new key is appended. Every change is
+    emitted per row so the bound table only touches that row. A remove leaves
+    a tombstone (the bound row is hidden), so row numbers stay stable until
+    the tombstones outweigh the live rows and the log is compacted."""
+    row_inserted = pyqtSignal(int, object) # row, entry
+    row_updated = pyqtSignal(int, object)  # row, entry
+    row_removed = pyqtSignal(int)          # row
+    cleared = pyqtSignal()
+    compacted = pyqtSignal()               # rows renumbered -> rebuild the bound table
+    
+    def __init__(self):
+        super().__init__()
+        self.entries = {} # log_key -> entry (insertion order = row order)
+        self.keys = []    # row -> log_key (None = tombstone)
+        self.rows = {}    # log_key -> row
+        self.tombstones = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __iter__(self):
+        return iter(self.entries.values())
+    
+    def get(self, key):
+        return self.entries.get(key)
+    
+    def upsert(self, key, entry):
+        """Insert or replace (O(1)); entry None deletes the key"""
+        if entry is None:
+            self.remove(key); return
+        entry['log_key'] = key
+        self.entries[key] = entry
+        row = self.rows.get(key)
+        if row is None:
+            self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            self.row_inserted.emit(len(self.keys) - 1, entry)
+        else:
+            self.row_updated.emit(row, entry)
+    
+    def remove(self, key):
+        """O(1): the row becomes a tombstone, rows below keep their numbers"""
+        row = self.rows.pop(key, None)
+        if row is None: return
+        del self.entries[key]
+        self.keys[row] = None
+        self.tombstones += 1
+        self.row_removed.emit(row)
+        if self.tombstones > 32 and self.tombstones * 2 > len(self.keys):
+            self.compact()
+            self.compacted.emit()
+    
+    def compact(self):
+        """Drop the tombstones and renumber the rows (amortized over the removes)"""
+        if not self.tombstones: return
+        self.keys = [k for k in self.keys if k is not None]
+        self.rows = {k: i for i, k in enumerate(self.keys)}
+        self.tombstones = 0
+    
+    def clear(self):
+        self.entries.clear(); self.keys.clear(); self.rows.clear()
+        self.tombstones = 0
+        self.cleared.emit()
+
 class PortData:
     def __init__(self, code, name):
         self.code = code
         self.name = name
         self.vessel_data_list = []
         self.original_vessel_data = [] 
+        # uid -> original dict (copies point at their source's original).
+        # Keyed by uid so duplicate name+voyage calls keep separate originals.
+        self.original_index = {}
+        self.original_by_key = {} # (name, voyage) -> first original (legacy fallback)
         self.terminal_list = []
         self.ts_connections = {} 
+        self.ts_auto_pairs = set()  # (disch_uid, load_uid) found by the TS pairing engine
+        self.ts_auto_rules = None   # (rules, dwell) of the last engine run -> moves re-evaluated
+        self.ts_pairs_by_vessel = defaultdict(set) # uid -> {(disch_uid, load_uid)} (both ends indexed)
         self.auto_connections = [] # List of (idx1, idx2) for duplicates
         
+        # Live Horizon: departed calls (data dicts) taken out of vessel_data_list,
+        # put back when Live mode is turned off
+        self.history_data = []
+        
+        # uids placed by the user (drags, copies): delay is measured from that
+        # placement, not from the original (optimizer, delay summary, what-if)
+        self.user_placed = set()
+        
+        # Compaction: uid -> ETA before a cascade first pushed the call. Only these
+        # calls are pulled left, and never before that ETA (user placements stay).
+        self.cascade_origin = {}
+        
         # Log Data (to repopulate tables)
-        # Master Log: List of tuples/dicts matching table columns
-        self.master_log_data = [] 
+        # Master Log: entries (dicts) matching table columns, keyed by log_key
+        self.master_log_data = ChangeLogStore()
         # Slave Log
-        self.slave_log_data = []
+        self.slave_log_data = ChangeLogStore()
+    
+    def clear_ts(self):
+        """Drop every TS link (manual and engine-found)"""
+        self.ts_connections = {}    # load uid -> [(disch uid, QColor)] (survives redraws)
+        self.ts_auto_pairs = set()
+        self.ts_auto_rules = None
+        self.ts_pairs_by_vessel = defaultdict(set)
+
+    def prune_ts(self, uids):
+        """Drop every TS link (manual and engine-found) with an end in `uids`; returns the dropped pairs"""
+        dropped = set()
+        for load_uid in list(self.ts_connections):
+            disch_list = self.ts_connections[load_uid]
+            keep = [(d, c) for d, c in disch_list if load_uid not in uids and d not in uids]
+            dropped.update((d, load_uid) for d, _ in disch_list if load_uid in uids or d in uids)
+            if keep: disch_list[:] = keep
+            else: del self.ts_connections[load_uid] # In place: the App mirrors this dict
+        for disch_uid, load_uid in dropped:
+            self.ts_auto_pairs.discard((disch_uid, load_uid))
+            self.unindex_ts_pair(disch_uid, load_uid)
+        for uid in uids:
+            self.ts_pairs_by_vessel.pop(uid, None)
+        return dropped
+
+    def index_ts_pair(self, disch_uid, load_uid):
+        self.ts_pairs_by_vessel[disch_uid].add((disch_uid, load_uid))
+        self.ts_pairs_by_vessel[load_uid].add((disch_uid, load_uid))
+
+    def unindex_ts_pair(self, disch_uid, load_uid):
+        self.ts_pairs_by_vessel[disch_uid].discard((disch_uid, load_uid))
+        self.ts_pairs_by_vessel[load_uid].discard((disch_uid, load_uid))
+
+    def rebuild_original_index(self):
+        """Re-index original_vessel_data (paste / reset; drops copy entries)"""
+        self.original_index = {d['uid']: d for d in self.original_vessel_data if 'uid' in d}
+        self.original_by_key = {}
+        for d in self.original_vessel_data:
+            self.original_by_key.setdefault((d['모선명'], d['선사항차']), d)
         
 # --- Main App ---
 class BerthMonitor(QMainWindow):
@@ -1026,6 +1992,41 @@ class BerthMonitor(QMainWindow):
         self.row_height = 70      
         self.safety_gap_h = 2
         
+        # Time Scale (Ctrl + Wheel / Settings) limits in pixels per hour
+        self.min_pixels_per_hour = 1
+        self.max_pixels_per_hour = 40
+        self.time_axis_items = []      # Grid/Header/Background items positioned on the time axis
+        self.total_hours = 0
+        
+        # Congestion Heatmap Overlay (berth x hour)
+        self.heatmap_enabled = False
+        self.heatmap_item = None
+        self.heatmap_palette = {
+            0: HeatmapOverlayItem.bgra(QColor(0, 0, 0, 0)),          # Free
+            1: HeatmapOverlayItem.bgra(QColor(80, 250, 123, 55)),    # Occupied (Green)
+            2: HeatmapOverlayItem.bgra(QColor(255, 184, 108, 150)),  # Safety gap violation (Orange)
+            3: HeatmapOverlayItem.bgra(QColor(255, 85, 85, 170)),    # Overlap (Red)
+        }
+        
+        # Drop-Cost Overlay: induced delay per berth-hour for the picked vessel
+        self.drop_cost_enabled = True
+        self.drop_cost_item = None
+        self.drop_cost_futures = []    # Pending process-pool results (one per berth)
+        self.drop_cost_palette = {
+            0: HeatmapOverlayItem.bgra(QColor(80, 250, 123, 45)),    # No delay (Green)
+            1: HeatmapOverlayItem.bgra(QColor(241, 250, 140, 90)),   # < 6H (Yellow)
+            2: HeatmapOverlayItem.bgra(QColor(255, 184, 108, 120)),  # < 24H (Orange)
+            3: HeatmapOverlayItem.bgra(QColor(255, 85, 85, 140)),    # >= 24H (Red)
+        }
+        self.drop_cost_timer = QTimer()
+        self.drop_cost_timer.timeout.connect(self.poll_drop_cost)
+        self.process_pool = None       # ProcessPoolExecutor, created on first use
+        self.process_pool_workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.background_jobs = []      # (future, callback) polled on the GUI thread
+        self.job_timer = QTimer()
+        self.job_timer.timeout.connect(self.poll_background_jobs)
+        self.optimizer_term_change_h = 24 # Terminal change weighed as this many hours of delay
+        
         self.line_colors = {}
         self.base_colors = [
             "#ffb3ba", "#ffdfba", "#ffffba", "#baffc9", 
@@ -1072,6 +2073,47 @@ class BerthMonitor(QMainWindow):
         self.current_time_box = None   # QGraphicsRectItem
         self.current_time_line = None  # QGraphicsLineItem (vertical line)
         self.vessel_items = []         # QGraphicsRectItem list (VesselItem)
+        self.vessel_item_map = {}      # Vessel identity (data['uid']) -> VesselItem
+        self.berth_index = {}           # full_berth -> BerthIntervalIndex
+        self.in_port_items = set()     # VesselItems with ETA <= now <= ETD
+        self.edge_layer = None         # EdgeLayerItem (TS arrows, copy/duplicate links)
+        self.ts_group_rows = {}        # TS table: load uid -> first row of its group
+        self.vessel_uid_seq = 0        # Source of stable vessel identities
+        self.gap_index_cache = {}      # full_berth -> (berth_index version, BerthGapIndex)
+        self.picked_vessel = None      # Last VesselItem picked in NORMAL mode (PLAN tab)
+        self.free_windows = []         # Last "find window" result: (start_h, full_berth)
+        self.schedule_conflicts = []   # Last check: (port, berth, earlier, later, kind, hours)
+        self.rotation_chains = []      # [[(port code, data)]] same ship across ports, rotation order
+        self.rotation_by_uid = {}      # (port code, uid) -> chain index
+        self.rotation_issues = {}      # chain index -> [knock-on delay (h) per call], late chains only
+        self.rotation_job_seq = 0      # Drops results of superseded background joins
+        self.what_if_job_seq = 0       # Drops results of superseded what-if comparisons
+        self.rotation_rows = []        # Rotation table row -> (port code, first late call)
+        self.cross_ts_links = []       # [((disch code, data), (load code, data))] TS between ports
+        self.cross_ts_uids = set()     # uids of calls in a cross-port link (move re-checks)
+        self.cross_rows = []           # Cross-port table row -> (load port code, load call)
+        self.what_if_labels = []       # Plan labels of the last what-if comparison
+        self.delay_model_default = (0.3, 6.0) # Arrival delay: P(late), mean hours late
+        self.robust_pending = 0        # Monte Carlo berth jobs still running
+        self.robust_job_seq = 0        # Drops berth results of a superseded / cleared run
+        self.queue_sim_summary = None  # Queue simulation: {terminal: wait summary} merged over jobs
+        self.queue_sim_pending = 0
+        self.sensitivity_delays = (1, 6, 12) # Hours of delay analyzed per vessel
+        self.sensitivity = {}          # uid -> [(shifted calls, shifted hours) per delay]
+        self.sensitivity_overlay = 1   # Index into sensitivity_delays used for the overlay
+        self.snap_enabled = False      # Drag: snap to the nearest slot that needs no cascade (opt-in)
+        self.snap_tolerance_h = 24     # Snap only to slots this close to the drop, else drop and cascade
+        self.snap_ghost = None         # QGraphicsRectItem marking the snap slot
+        self.snap_target = None        # (x, y) the dragged vessel lands on
+        self.drag_gap_cache = {}       # full_berth -> BerthGapIndex without the dragged vessel
+        self.preview_enabled = True    # Drag: ghost positions of the vessels a drop would push
+        self.compaction_enabled = True # After a move: pull cascade-shifted vessels back (pull-left)
+        self.preview_item = None       # Dragged VesselItem awaiting a (coalesced) preview
+        self.preview_cache = {}        # full_berth -> (items, starts, ends, base_starts, base_ends, conflicts)
+        self.preview_ghosts = []       # Reused ghost QGraphicsRectItems
+        self.preview_timer = QTimer()
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.timeout.connect(self.update_cascade_preview)
         
         # Current Time Update Timer (1 second)
         self.time_update_timer = QTimer()
@@ -1083,6 +2125,15 @@ class BerthMonitor(QMainWindow):
         self.ticker_timer.timeout.connect(self.update_ticker_content)
         self.ticker_timer.start(1000)
         
+        # Live Horizon Mode (sliding window, e.g. now - 2D ~ now + 21D)
+        self.live_mode_enabled = False
+        self.live_window_back_days = 2
+        self.live_window_ahead_days = 21
+        self.live_window_start = None
+        self.live_window_timer = QTimer()
+        self.live_window_timer.timeout.connect(self.slide_live_window)
+        self.live_window_timer.start(60 * 1000)  # Check once a minute (window moves per day)
+        
         self.is_dark_mode = True # Default to Dark Mode
         self.gray_mode_enabled = False # Default: Gray mode OFF
         self.terminal_order = get_terminal_order() # Load saved terminal order
@@ -1302,6 +2353,7 @@ class BerthMonitor(QMainWindow):
         self.slave_table.setObjectName("changeTable") 
         self.slave_table.setMinimumHeight(200)
         logs_layout.addWidget(self.slave_table)
+        self.bind_log_stores()
         
         # TS CONNECT LOG
         ts_header = QHBoxLayout()
@@ -1342,7 +2394,11 @@ class BerthMonitor(QMainWindow):
         self.create_search_tab()
         self.tabs.addTab(self.tab_search, "SEARCH")
         
-        # --- TAB 6: SETTINGS (Gear Icon) ---
+        # --- TAB 6: PLAN ---
+        self.create_plan_tab()
+        self.tabs.addTab(self.tab_plan, "PLAN")
+        
+        # --- TAB 7: SETTINGS (Gear Icon) ---
         self.create_settings_tab()
         self.tabs.addTab(self.tab_settings, "⚙️")
         
@@ -1511,21 +2567,61 @@ class BerthMonitor(QMainWindow):
         self.draw_graphic()
 
     def repopulate_logs(self):
+        # Full rebuild (port switch); moves go through the per-row store events
+        port = self.ports[self.active_port_code]
+        port.master_log_data.compact() # Table rows follow the store rows
+        port.slave_log_data.compact()
         # Master Log
         self.master_table.setRowCount(0)
-        port = self.ports[self.active_port_code]
         for entry in port.master_log_data:
             self.add_master_log_row(entry)
+        self.master_table.scrollToBottom()
             
         # Slave Log
         self.slave_table.setRowCount(0)
         for entry in port.slave_log_data:
             self.add_slave_log_row(entry)
+        self.slave_table.scrollToBottom()
+
+    def bind_log_stores(self):
+        """Route the per-row events of every port's log stores to the log tables"""
+        for port in self.ports.values():
+            for store in (port.master_log_data, port.slave_log_data):
+                store.row_inserted.connect(lambda row, entry, s=store: self.on_log_row_changed(s, row, entry, True))
+                store.row_updated.connect(lambda row, entry, s=store: self.on_log_row_changed(s, row, entry, False))
+                store.row_removed.connect(lambda row, s=store: self.on_log_row_removed(s, row))
+                store.cleared.connect(lambda s=store: self.on_log_row_removed(s, None))
+                store.compacted.connect(lambda s=store: self.on_log_compacted(s))
+
+    def log_view_for(self, store):
+        # Only the ACTIVE port's stores are shown
+        port = self.ports[self.active_port_code]
+        if store is port.master_log_data: return self.master_table, self.set_master_log_row
+        if store is port.slave_log_data: return self.slave_table, self.set_slave_log_row
+        return None, None
+
+    def on_log_row_changed(self, store, row, entry, inserted):
+        table, set_row = self.log_view_for(store)
+        if not table: return
+        if inserted: table.insertRow(row)
+        set_row(row, entry)
+
+    def on_log_row_removed(self, store, row):
+        table, _ = self.log_view_for(store)
+        if not table: return
+        if row is None: table.setRowCount(0) # cleared
+        else: table.setRowHidden(row, True) # Tombstone in the store
+    
+    def on_log_compacted(self, store):
+        table, _ = self.log_view_for(store)
+        if table: self.repopulate_logs()
 
     def add_master_log_row(self, entry):
         row = self.master_table.rowCount()
         self.master_table.insertRow(row)
-        
+        self.set_master_log_row(row, entry)
+
+    def set_master_log_row(self, row, entry):
         # Col 0: Vessel (Widget or Item)
         if entry.get('vessel_widget_text'):
              lbl = QLabel(entry['vessel_widget_text'])
@@ -1533,6 +2629,7 @@ class BerthMonitor(QMainWindow):
              lbl.setStyleSheet(entry['vessel_widget_style'])
              self.master_table.setCellWidget(row, 0, lbl)
         else:
+             self.master_table.removeCellWidget(row, 0)
              self.master_table.setItem(row, 0, QTableWidgetItem(entry['vessel_text']))
              
         self.master_table.setItem(row, 1, QTableWidgetItem(entry['from']))
@@ -1544,6 +2641,7 @@ class BerthMonitor(QMainWindow):
              lbl.setStyleSheet(entry['to_widget_style'])
              self.master_table.setCellWidget(row, 2, lbl)
         else:
+             self.master_table.removeCellWidget(row, 2)
              self.master_table.setItem(row, 2, QTableWidgetItem(entry['to_text']))
              
         # Col 3: Shift
@@ -1552,12 +2650,13 @@ class BerthMonitor(QMainWindow):
         if entry.get('shift_color'):
             delta_item.setForeground(QColor(entry['shift_color']))
         self.master_table.setItem(row, 3, delta_item)
-        
-        self.master_table.scrollToBottom()
 
     def add_slave_log_row(self, entry):
         row = self.slave_table.rowCount()
         self.slave_table.insertRow(row)
+        self.set_slave_log_row(row, entry)
+
+    def set_slave_log_row(self, row, entry):
         self.slave_table.setItem(row, 0, QTableWidgetItem(entry['name']))
         self.slave_table.setItem(row, 1, QTableWidgetItem(entry['old_eta']))
         self.slave_table.setItem(row, 2, QTableWidgetItem(entry['new_eta']))
@@ -1566,7 +2665,6 @@ class BerthMonitor(QMainWindow):
         delta_item.setTextAlignment(Qt.AlignCenter)
         delta_item.setForeground(QColor("#ffb86c"))
         self.slave_table.setItem(row, 3, delta_item)
-        self.slave_table.scrollToBottom()
 
     def create_filter_tab(self):
         self.tab_filters = QWidget()
@@ -2000,6 +3098,708 @@ class BerthMonitor(QMainWindow):
         layout.addWidget(QLabel("<b>Search Results:</b>"))
         layout.addWidget(self.search_table)
 
+    def create_plan_tab(self):
+        self.tab_plan = QWidget()
+        layout = QVBoxLayout(self.tab_plan)
+        layout.setContentsMargins(5, 5, 5, 5)
+        
+        self.picked_label = QLabel("Picked Vessel: -")
+        self.picked_label.setStyleSheet("font-weight: bold; color: #7aa2f7;")
+        layout.addWidget(self.picked_label)
+        
+        # --- Find Free Window ---
+        window_group = QGroupBox("Find Free Window")
+        window_layout = QVBoxLayout(window_group)
+        
+        duration_layout = QHBoxLayout()
+        duration_layout.addWidget(QLabel("Duration (h):"))
+        self.window_duration_spin = QDoubleSpinBox()
+        self.window_duration_spin.setDecimals(0)
+        self.window_duration_spin.setRange(1, 24 * 30)
+        self.window_duration_spin.setValue(24)
+        duration_layout.addWidget(self.window_duration_spin)
+        duration_layout.addStretch()
+        window_layout.addLayout(duration_layout)
+        
+        self.window_terminal_input = QLineEdit()
+        self.window_terminal_input.setPlaceholderText("Terminals (e.g. PNC, BCT) - empty = all")
+        window_layout.addWidget(self.window_terminal_input)
+        
+        btn_layout = QHBoxLayout()
+        btn_find = QPushButton("🔍 FIND")
+        btn_find.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_find.clicked.connect(self.on_find_free_windows)
+        btn_drop = QPushButton("📥 DROP PICKED")
+        btn_drop.setStyleSheet("background-color: #9ece6a; color: black; font-weight: bold;")
+        btn_drop.clicked.connect(self.drop_picked_vessel)
+        btn_layout.addWidget(btn_find)
+        btn_layout.addWidget(btn_drop)
+        window_layout.addLayout(btn_layout)
+        
+        self.window_table = QTableWidget()
+        self.window_table.setColumnCount(3)
+        self.window_table.setHorizontalHeaderLabels(["Berth", "Start", "Free Until"])
+        self.window_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.window_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.window_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.window_table.cellClicked.connect(self.jump_to_free_window)
+        self.window_table.setMinimumHeight(180)
+        window_layout.addWidget(self.window_table)
+        
+        layout.addWidget(window_group)
+        
+        # --- Drag Assist ---
+        drag_group = QGroupBox("Drag Assist")
+        drag_layout = QVBoxLayout(drag_group)
+        drag_layout.addWidget(QLabel("Snap to Free Slot (no cascade):"))
+        snap_layout = QHBoxLayout()
+        self.rb_snap_off = QRadioButton("OFF")
+        self.rb_snap_on = QRadioButton("ON")
+        self.rb_snap_off.setChecked(not self.snap_enabled)
+        self.rb_snap_on.setChecked(self.snap_enabled)
+        self.snap_button_group = QButtonGroup(self)
+        self.snap_button_group.addButton(self.rb_snap_off)
+        self.snap_button_group.addButton(self.rb_snap_on)
+        snap_layout.addWidget(self.rb_snap_off)
+        snap_layout.addWidget(self.rb_snap_on)
+        snap_layout.addStretch()
+        snap_layout.addWidget(QLabel("Range (h):"))
+        self.snap_tolerance_spin = QDoubleSpinBox()
+        self.snap_tolerance_spin.setDecimals(0)
+        self.snap_tolerance_spin.setRange(1, 240)
+        self.snap_tolerance_spin.setValue(self.snap_tolerance_h)
+        self.snap_tolerance_spin.valueChanged.connect(lambda v: setattr(self, 'snap_tolerance_h', v))
+        snap_layout.addWidget(self.snap_tolerance_spin)
+        drag_layout.addLayout(snap_layout)
+        self.rb_snap_on.toggled.connect(self.on_snap_changed)
+        
+        drag_layout.addWidget(QLabel("Drop-Cost Overlay (induced delay per berth-hour):"))
+        cost_layout = QHBoxLayout()
+        self.rb_cost_off = QRadioButton("OFF")
+        self.rb_cost_on = QRadioButton("ON")
+        self.rb_cost_off.setChecked(not self.drop_cost_enabled)
+        self.rb_cost_on.setChecked(self.drop_cost_enabled)
+        self.cost_button_group = QButtonGroup(self)
+        self.cost_button_group.addButton(self.rb_cost_off)
+        self.cost_button_group.addButton(self.rb_cost_on)
+        cost_layout.addWidget(self.rb_cost_off)
+        cost_layout.addWidget(self.rb_cost_on)
+        cost_layout.addStretch()
+        drag_layout.addLayout(cost_layout)
+        self.rb_cost_on.toggled.connect(self.on_drop_cost_changed)
+        
+        drag_layout.addWidget(QLabel("Cascade Preview (ghosts of pushed vessels):"))
+        preview_layout = QHBoxLayout()
+        self.rb_preview_off = QRadioButton("OFF")
+        self.rb_preview_on = QRadioButton("ON")
+        self.rb_preview_off.setChecked(not self.preview_enabled)
+        self.rb_preview_on.setChecked(self.preview_enabled)
+        self.preview_button_group = QButtonGroup(self)
+        self.preview_button_group.addButton(self.rb_preview_off)
+        self.preview_button_group.addButton(self.rb_preview_on)
+        preview_layout.addWidget(self.rb_preview_off)
+        preview_layout.addWidget(self.rb_preview_on)
+        preview_layout.addStretch()
+        drag_layout.addLayout(preview_layout)
+        self.rb_preview_on.toggled.connect(self.on_preview_changed)
+        
+        drag_layout.addWidget(QLabel("Pull-Left Compaction (shifted vessels back to original ETA):"))
+        compact_layout = QHBoxLayout()
+        self.rb_compact_off = QRadioButton("OFF")
+        self.rb_compact_on = QRadioButton("ON")
+        self.rb_compact_off.setChecked(not self.compaction_enabled)
+        self.rb_compact_on.setChecked(self.compaction_enabled)
+        self.compact_button_group = QButtonGroup(self)
+        self.compact_button_group.addButton(self.rb_compact_off)
+        self.compact_button_group.addButton(self.rb_compact_on)
+        compact_layout.addWidget(self.rb_compact_off)
+        compact_layout.addWidget(self.rb_compact_on)
+        compact_layout.addStretch()
+        drag_layout.addLayout(compact_layout)
+        self.rb_compact_on.toggled.connect(self.on_compaction_changed)
+        
+        layout.addWidget(drag_group)
+        
+        # --- Schedule Check (all ports) ---
+        check_group = QGroupBox("Schedule Check (All Ports)")
+        check_layout = QVBoxLayout(check_group)
+        check_btn_layout = QHBoxLayout()
+        btn_check = QPushButton("🔍 CHECK")
+        btn_check.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_check.clicked.connect(self.check_all_ports)
+        btn_repair = QPushButton("🛠 REPAIR ALL")
+        btn_repair.setStyleSheet("background-color: #f7768e; color: black; font-weight: bold;")
+        btn_repair.clicked.connect(self.repair_all_ports)
+        check_btn_layout.addWidget(btn_check)
+        check_btn_layout.addWidget(btn_repair)
+        check_layout.addLayout(check_btn_layout)
+        
+        self.conflict_summary_label = QLabel("Conflicts: -")
+        self.conflict_summary_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        check_layout.addWidget(self.conflict_summary_label)
+        
+        self.conflict_table = QTableWidget()
+        self.conflict_table.setColumnCount(4)
+        self.conflict_table.setHorizontalHeaderLabels(["Port", "Berth", "Vessels", "Issue"])
+        self.conflict_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.conflict_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.conflict_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.conflict_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.conflict_table.cellClicked.connect(self.focus_conflict)
+        self.conflict_table.setMinimumHeight(160)
+        check_layout.addWidget(self.conflict_table)
+        
+        layout.addWidget(check_group)
+        
+        # --- Berth Optimizer (active port) ---
+        opt_group = QGroupBox("Berth Optimizer (Active Port)")
+        opt_layout = QVBoxLayout(opt_group)
+        weight_layout = QHBoxLayout()
+        weight_layout.addWidget(QLabel("Terminal change = delay of (h):"))
+        self.term_change_spin = QDoubleSpinBox()
+        self.term_change_spin.setDecimals(0)
+        self.term_change_spin.setRange(0, 24 * 14)
+        self.term_change_spin.setValue(self.optimizer_term_change_h)
+        weight_layout.addWidget(self.term_change_spin)
+        weight_layout.addStretch()
+        opt_layout.addLayout(weight_layout)
+        
+        self.btn_optimize = QPushButton("⚙ OPTIMIZE")
+        self.btn_optimize.setStyleSheet("background-color: #bb9af7; color: black; font-weight: bold;")
+        self.btn_optimize.clicked.connect(self.run_berth_optimizer)
+        opt_layout.addWidget(self.btn_optimize)
+        self.optimizer_status_label = QLabel("")
+        self.optimizer_status_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        opt_layout.addWidget(self.optimizer_status_label)
+        
+        layout.addWidget(opt_group)
+        
+        # --- What-If (picked vessel) ---
+        what_if_group = QGroupBox("What-If (Picked Vessel)")
+        what_if_layout = QVBoxLayout(what_if_group)
+        btn_compare = QPushButton("⚖ COMPARE BERTHS / WINDOWS")
+        btn_compare.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_compare.clicked.connect(self.compare_picked_vessel)
+        what_if_layout.addWidget(btn_compare)
+        self.what_if_status_label = QLabel("")
+        self.what_if_status_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        what_if_layout.addWidget(self.what_if_status_label)
+        self.what_if_table = QTableWidget()
+        self.what_if_table.setColumnCount(5)
+        self.what_if_table.setHorizontalHeaderLabels(["Plan", "Delay(H)", "Shifted", "Term Chg", "Gap Viol"])
+        self.what_if_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.what_if_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.what_if_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.what_if_table.setSortingEnabled(True)
+        self.what_if_table.setMinimumHeight(160)
+        what_if_layout.addWidget(self.what_if_table)
+        
+        layout.addWidget(what_if_group)
+        
+        # --- Robustness (Monte Carlo) ---
+        robust_group = QGroupBox("Robustness (Monte Carlo)")
+        robust_layout = QVBoxLayout(robust_group)
+        robust_param_layout = QHBoxLayout()
+        robust_param_layout.addWidget(QLabel("Samples:"))
+        self.robust_samples_spin = QDoubleSpinBox()
+        self.robust_samples_spin.setDecimals(0)
+        self.robust_samples_spin.setRange(100, 100000)
+        self.robust_samples_spin.setValue(2000)
+        robust_param_layout.addWidget(self.robust_samples_spin)
+        robust_param_layout.addWidget(QLabel("Pushed > (h):"))
+        self.robust_threshold_spin = QDoubleSpinBox()
+        self.robust_threshold_spin.setDecimals(0)
+        self.robust_threshold_spin.setRange(0, 240)
+        self.robust_threshold_spin.setValue(6)
+        robust_param_layout.addWidget(self.robust_threshold_spin)
+        robust_param_layout.addStretch()
+        robust_layout.addLayout(robust_param_layout)
+        
+        robust_hint = QLabel("Delay model per route / line (KEY P_LATE MEAN_H), others use "
+                             f"{self.delay_model_default[0]} {self.delay_model_default[1]:.0f}:")
+        robust_hint.setWordWrap(True)
+        robust_hint.setStyleSheet("font-size: 11px; color: #565f89;")
+        robust_layout.addWidget(robust_hint)
+        self.delay_model_input = QTextEdit()
+        self.delay_model_input.setPlaceholderText("Example:\nAE1 0.5 12\nHMM 0.2 4")
+        self.delay_model_input.setMaximumHeight(70)
+        robust_layout.addWidget(self.delay_model_input)
+        
+        robust_btn_layout = QHBoxLayout()
+        btn_robust = QPushButton("🎲 RUN")
+        btn_robust.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_robust.clicked.connect(self.run_robustness)
+        btn_robust_clear = QPushButton("❌ CLEAR")
+        btn_robust_clear.setStyleSheet("background-color: #f7768e; color: black; font-weight: bold;")
+        btn_robust_clear.clicked.connect(self.clear_robustness)
+        robust_btn_layout.addWidget(btn_robust)
+        robust_btn_layout.addWidget(btn_robust_clear)
+        robust_layout.addLayout(robust_btn_layout)
+        self.robust_status_label = QLabel("")
+        self.robust_status_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        robust_layout.addWidget(self.robust_status_label)
+        
+        layout.addWidget(robust_group)
+        
+        # --- Queue Simulation ---
+        queue_group = QGroupBox("Queue Simulation")
+        queue_layout = QVBoxLayout(queue_group)
+        queue_param_layout = QHBoxLayout()
+        queue_param_layout.addWidget(QLabel("Runs:"))
+        self.queue_runs_spin = QDoubleSpinBox()
+        self.queue_runs_spin.setDecimals(0)
+        self.queue_runs_spin.setRange(10, 10000)
+        self.queue_runs_spin.setValue(200)
+        queue_param_layout.addWidget(self.queue_runs_spin)
+        btn_queue = QPushButton("⏱️ SIMULATE")
+        btn_queue.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_queue.clicked.connect(self.run_queue_simulation)
+        queue_param_layout.addWidget(btn_queue)
+        queue_layout.addLayout(queue_param_layout)
+        queue_hint = QLabel("Arrival delays use the robustness delay model above.")
+        queue_hint.setStyleSheet("font-size: 11px; color: #565f89;")
+        queue_layout.addWidget(queue_hint)
+        self.queue_status_label = QLabel("")
+        self.queue_status_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        queue_layout.addWidget(self.queue_status_label)
+        
+        self.queue_table = QTableWidget()
+        self.queue_table.setColumnCount(7)
+        self.queue_table.setHorizontalHeaderLabels(["Terminal", "Calls", "Mean", "P50", "P90", "Max", "Waiting %"])
+        self.queue_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.queue_table.verticalHeader().setVisible(False)
+        self.queue_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.queue_table.setMinimumHeight(150)
+        queue_layout.addWidget(self.queue_table)
+        
+        layout.addWidget(queue_group)
+        
+        # --- Cascade Sensitivity ---
+        sens_group = QGroupBox("Cascade Sensitivity")
+        sens_layout = QVBoxLayout(sens_group)
+        sens_btn_layout = QHBoxLayout()
+        btn_sens = QPushButton("📈 ANALYZE")
+        btn_sens.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_sens.clicked.connect(self.run_cascade_sensitivity)
+        btn_sens_clear = QPushButton("❌ CLEAR")
+        btn_sens_clear.setStyleSheet("background-color: #f7768e; color: black; font-weight: bold;")
+        btn_sens_clear.clicked.connect(self.clear_cascade_sensitivity)
+        sens_btn_layout.addWidget(btn_sens)
+        sens_btn_layout.addWidget(btn_sens_clear)
+        sens_layout.addLayout(sens_btn_layout)
+        
+        sens_layout.addWidget(QLabel("Overlay (shifted hours if delayed by):"))
+        sens_radio_layout = QHBoxLayout()
+        self.sensitivity_button_group = QButtonGroup(self)
+        for idx, delay in enumerate(self.sensitivity_delays):
+            rb = QRadioButton(f"+{delay}h")
+            rb.setChecked(idx == self.sensitivity_overlay)
+            self.sensitivity_button_group.addButton(rb, idx)
+            sens_radio_layout.addWidget(rb)
+        sens_radio_layout.addStretch()
+        sens_layout.addLayout(sens_radio_layout)
+        self.sensitivity_button_group.buttonClicked[int].connect(self.on_sensitivity_overlay_changed)
+        
+        self.sens_status_label = QLabel("")
+        self.sens_status_label.setWordWrap(True)
+        self.sens_status_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        sens_layout.addWidget(self.sens_status_label)
+        
+        self.sens_table = QTableWidget()
+        headers = ["Vessel", "Berth"]
+        for delay in self.sensitivity_delays:
+            headers += [f"+{delay}h #", f"+{delay}h H"]
+        self.sens_table.setColumnCount(len(headers))
+        self.sens_table.setHorizontalHeaderLabels(headers)
+        self.sens_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.sens_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.sens_table.verticalHeader().setVisible(False)
+        self.sens_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.sens_table.setSortingEnabled(True)
+        self.sens_table.setMinimumHeight(200)
+        self.sens_table.cellClicked.connect(self.focus_sensitivity_row)
+        sens_layout.addWidget(self.sens_table)
+        
+        layout.addWidget(sens_group)
+        
+        # --- TS Pairing (Auto) ---
+        ts_group = QGroupBox("TS Pairing (Auto)")
+        ts_layout = QVBoxLayout(ts_group)
+        ts_hint = QLabel("Rules: DISCH_KEY LOAD_KEY per line (route or line, * = any):")
+        ts_hint.setWordWrap(True)
+        ts_hint.setStyleSheet("font-size: 11px; color: #565f89;")
+        ts_layout.addWidget(ts_hint)
+        self.ts_rules_input = QTextEdit()
+        self.ts_rules_input.setPlaceholderText("Example:\nAE1 NE2\nHMM *")
+        self.ts_rules_input.setMaximumHeight(70)
+        ts_layout.addWidget(self.ts_rules_input)
+        ts_param_layout = QHBoxLayout()
+        ts_param_layout.addWidget(QLabel("Max Yard Dwell (h):"))
+        self.ts_dwell_spin = QDoubleSpinBox()
+        self.ts_dwell_spin.setDecimals(0)
+        self.ts_dwell_spin.setRange(0, 720)
+        self.ts_dwell_spin.setValue(72)
+        ts_param_layout.addWidget(self.ts_dwell_spin)
+        ts_param_layout.addStretch()
+        ts_layout.addLayout(ts_param_layout)
+        ts_btn_layout = QHBoxLayout()
+        btn_ts = QPushButton("🔗 FIND TS")
+        btn_ts.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_ts.clicked.connect(self.run_auto_ts)
+        btn_ts_clear = QPushButton("❌ CLEAR")
+        btn_ts_clear.setStyleSheet("background-color: #f7768e; color: black; font-weight: bold;")
+        btn_ts_clear.clicked.connect(self.clear_auto_ts)
+        ts_btn_layout.addWidget(btn_ts)
+        ts_btn_layout.addWidget(btn_ts_clear)
+        ts_layout.addLayout(ts_btn_layout)
+        self.ts_status_label = QLabel("")
+        self.ts_status_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        ts_layout.addWidget(self.ts_status_label)
+        
+        layout.addWidget(ts_group)
+        
+        # --- Rotation Chains (All Ports) ---
+        rotation_group = QGroupBox("Rotation Chains (All Ports)")
+        rotation_layout = QVBoxLayout(rotation_group)
+        rotation_param_layout = QHBoxLayout()
+        rotation_param_layout.addWidget(QLabel("Port-to-Port Transit (h):"))
+        self.transit_spin = QDoubleSpinBox()
+        self.transit_spin.setDecimals(0)
+        self.transit_spin.setRange(0, 240)
+        self.transit_spin.setValue(12)
+        self.transit_spin.valueChanged.connect(lambda _: self.evaluate_rotations())
+        rotation_param_layout.addWidget(self.transit_spin)
+        btn_rotation = QPushButton("🔄 REBUILD")
+        btn_rotation.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_rotation.clicked.connect(self.schedule_rotation_chains)
+        rotation_param_layout.addWidget(btn_rotation)
+        rotation_layout.addLayout(rotation_param_layout)
+        self.rotation_status_label = QLabel("")
+        self.rotation_status_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        rotation_layout.addWidget(self.rotation_status_label)
+        
+        self.rotation_table = QTableWidget()
+        self.rotation_table.setColumnCount(4)
+        self.rotation_table.setHorizontalHeaderLabels(["Vessel", "Late Leg", "Late(H)", "Downstream"])
+        self.rotation_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.rotation_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.rotation_table.verticalHeader().setVisible(False)
+        self.rotation_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.rotation_table.setMinimumHeight(150)
+        self.rotation_table.cellClicked.connect(self.focus_rotation_row)
+        rotation_layout.addWidget(self.rotation_table)
+        
+        layout.addWidget(rotation_group)
+        
+        # --- Cross-Port TS ---
+        cross_group = QGroupBox("Cross-Port TS")
+        cross_layout = QVBoxLayout(cross_group)
+        cross_hint = QLabel("TS rules / yard dwell from TS Pairing, transit from Rotation Chains.")
+        cross_hint.setWordWrap(True)
+        cross_hint.setStyleSheet("font-size: 11px; color: #565f89;")
+        cross_layout.addWidget(cross_hint)
+        cross_btn_layout = QHBoxLayout()
+        btn_cross = QPushButton("🌐 FIND")
+        btn_cross.setStyleSheet("background-color: #7dcfff; color: black; font-weight: bold;")
+        btn_cross.clicked.connect(self.run_cross_port_ts)
+        btn_cross_clear = QPushButton("❌ CLEAR")
+        btn_cross_clear.setStyleSheet("background-color: #f7768e; color: black; font-weight: bold;")
+        btn_cross_clear.clicked.connect(self.clear_cross_port_ts)
+        cross_btn_layout.addWidget(btn_cross)
+        cross_btn_layout.addWidget(btn_cross_clear)
+        cross_layout.addLayout(cross_btn_layout)
+        self.cross_status_label = QLabel("")
+        self.cross_status_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        cross_layout.addWidget(self.cross_status_label)
+        
+        self.cross_table = QTableWidget()
+        self.cross_table.setColumnCount(3)
+        self.cross_table.setHorizontalHeaderLabels(["DISCH", "LOAD", "Status"])
+        self.cross_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.cross_table.verticalHeader().setVisible(False)
+        self.cross_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.cross_table.setMinimumHeight(150)
+        self.cross_table.cellClicked.connect(self.focus_cross_ts_row)
+        cross_layout.addWidget(self.cross_table)
+        self.transit_spin.valueChanged.connect(lambda _: self.refresh_cross_ts_table())
+        
+        layout.addWidget(cross_group)
+        layout.addStretch()
+
+    def on_snap_changed(self, enabled):
+        self.snap_enabled = enabled
+
+    def on_compaction_changed(self, enabled):
+        self.compaction_enabled = enabled
+
+    def on_preview_changed(self, enabled):
+        self.preview_enabled = enabled
+        if not enabled:
+            self.clear_cascade_preview()
+
+    def request_cascade_preview(self, v_item):
+        """Mouse move: coalesce bursts of moves into one preview update"""
+        if not self.preview_enabled: return
+        self.preview_item = v_item
+        if not self.preview_timer.isActive():
+            self.preview_timer.start(30)
+
+    def update_cascade_preview(self):
+        """Ghosts where the vessels of the hovered berth would end up after the drop.
+        Real data is untouched; per berth the sorted calls, their baseline cascade and the existing
+        conflicts are prepared once per drag, each update only walks the pushed chain."""
+        v_item = self.preview_item
+        if not v_item or v_item.scene() is not self.scene or not self.terminal_list: return
+        
+        # Landing spot: the hour under the vessel (raw drop, the cascade it would cause)
+        x, y = v_item.pos().x(), v_item.pos().y() + v_item.rect().height() / 2
+        term_idx = max(0, min(int(y // self.row_height), len(self.terminal_list) - 1))
+        berth = self.terminal_list[term_idx]
+        h = round(x / self.pixels_per_hour)
+        duration = max(1, round(v_item.rect().width() / self.pixels_per_hour))
+        
+        cached = self.preview_cache.get(berth)
+        if cached is None:
+            items = [v for v in self.berth_index[berth].items if v is not v_item]
+            starts = [self.hours_from_start(v.data['eta']) for v in items]
+            ends = [self.hours_from_start(v.data['etd']) for v in items]
+            base_starts, base_ends = cascade_baseline(starts, ends, self.safety_gap_h)
+            conflicts = {i: base_starts[i] for i in range(len(items)) if base_starts[i] != starts[i]} # Existing conflicts
+            cached = self.preview_cache[berth] = (items, starts, ends, base_starts, base_ends, conflicts)
+        items, starts, ends, base_starts, base_ends, conflicts = cached
+        
+        k = bisect.bisect_right(starts, h)
+        _, chain = push_chain(starts, ends, base_starts, base_ends, k, h, duration, self.safety_gap_h)
+        new_starts = dict(conflicts)
+        new_starts.update(chain)
+        
+        # Reuse ghost items (no scene churn while dragging)
+        for n, (i, new_start) in enumerate(sorted(new_starts.items())):
+            if n == len(self.preview_ghosts):
+                ghost = QGraphicsRectItem()
+                ghost.setPen(QPen(QColor("#ffb86c"), 2, Qt.DashLine))
+                ghost.setBrush(QBrush(QColor(255, 184, 108, 50)))
+                ghost.setZValue(45) # Over vessels (translucent), below edges
+                ghost.setAcceptedMouseButtons(Qt.NoButton)
+                ghost.label = QGraphicsTextItem(ghost)
+                ghost.label.setDefaultTextColor(QColor("#ffb86c"))
+                self.scene.addItem(ghost)
+                self.preview_ghosts.append(ghost)
+            ghost = self.preview_ghosts[n]
+            v = items[i]
+            gx = new_start * self.pixels_per_hour
+            ghost.setRect(gx, v.pos().y(), v.rect().width(), v.rect().height())
+            ghost.label.setPlainText(format_time_delta(timedelta(hours=new_start - starts[i])))
+            ghost.label.setPos(gx + 2, v.pos().y() - 2)
+            ghost.show()
+        for ghost in self.preview_ghosts[len(new_starts):]:
+            ghost.hide()
+
+    def clear_cascade_preview(self):
+        self.preview_timer.stop()
+        self.preview_item = None
+        self.preview_cache = {}
+        for ghost in self.preview_ghosts:
+            self.scene.removeItem(ghost)
+        self.preview_ghosts = []
+
+    def on_drop_cost_changed(self, enabled):
+        self.drop_cost_enabled = enabled
+        if not enabled:
+            self.clear_drop_cost()
+
+    def get_process_pool(self):
+        """Shared worker pool for background schedule analysis"""
+        if self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(max_workers=self.process_pool_workers)
+        return self.process_pool
+
+    def submit_background_job(self, fn, task, callback, on_error=None):
+        """Run fn(task) in the process pool; callback(result) / on_error(exc) on the GUI thread"""
+        future = self.get_process_pool().submit(fn, task)
+        self.background_jobs.append((future, callback, on_error))
+        if not self.job_timer.isActive():
+            self.job_timer.start(100)
+        return future
+
+    def poll_background_jobs(self):
+        done = [job for job in self.background_jobs if job[0].done()]
+        for job in done:
+            self.background_jobs.remove(job)
+            future, callback, on_error = job
+            if future.cancelled(): continue
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Background job failed: {e}")
+                if on_error: on_error(e)
+                continue
+            callback(result)
+        if not self.background_jobs:
+            self.job_timer.stop()
+
+    def start_drop_cost(self, v_item):
+        """Vessel picked up: one background job per berth, rows fill in as they finish"""
+        self.clear_drop_cost()
+        if not self.drop_cost_enabled or not self.terminal_list or not self.total_hours: return
+        
+        self.drop_cost_item = HeatmapOverlayItem(len(self.terminal_list), self.total_hours)
+        self.drop_cost_item.setZValue(-9) # Above the congestion heatmap
+        self.drop_cost_item.set_cell_size(self.pixels_per_hour, self.row_height)
+        self.scene.addItem(self.drop_cost_item)
+        
+        duration = max(1, round((v_item.data['etd'] - v_item.data['eta']).total_seconds() / 3600))
+        pool = self.get_process_pool()
+        for row, berth in enumerate(self.terminal_list):
+            calls = [v for v in self.berth_index[berth].items if v is not v_item]
+            task = (row, [self.hours_from_start(v.data['eta']) for v in calls], [self.hours_from_start(v.data['etd']) for v in calls],
+                    duration, self.drop_cost_item.hours, self.safety_gap_h)
+            self.drop_cost_futures.append(pool.submit(drop_cost_row, task))
+        self.drop_cost_timer.start(50)
+
+    def poll_drop_cost(self):
+        done = [f for f in self.drop_cost_futures if f.done()]
+        if not done: return
+        for future in done:
+            self.drop_cost_futures.remove(future)
+            try:
+                row, costs = future.result()
+            except Exception as e:
+                print(f"Drop-cost worker failed: {e}")
+                continue
+            if self.drop_cost_item:
+                cells = [0 if c <= 0 else (1 if c < 6 else (2 if c < 24 else 3)) for c in costs]
+                self.drop_cost_item.set_row(row, HeatmapOverlayItem.pack_row(cells, self.drop_cost_palette))
+        if self.drop_cost_item:
+            self.drop_cost_item.render()
+        if not self.drop_cost_futures:
+            self.drop_cost_timer.stop()
+
+    def cancel_drop_cost(self):
+        for future in self.drop_cost_futures:
+            future.cancel()
+        self.drop_cost_futures = []
+        self.drop_cost_timer.stop()
+
+    def clear_drop_cost(self):
+        self.cancel_drop_cost()
+        if self.drop_cost_item:
+            self.scene.removeItem(self.drop_cost_item)
+            self.drop_cost_item = None
+
+    def update_drag_snap(self, v_item):
+        """Mouse move while dragging: ghost at the nearest no-cascade slot of the hovered berth,
+        if it lies within snap_tolerance_h of the drop (else the drop cascades as usual).
+        The berth's gap index (without the dragged vessel) is built once per drag -> O(log n) per move."""
+        if not self.snap_enabled or not self.terminal_list: return
+        center_y = v_item.pos().y() + v_item.rect().height() / 2
+        term_idx = max(0, min(int(center_y // self.row_height), len(self.terminal_list) - 1))
+        berth = self.terminal_list[term_idx]
+        
+        gaps = self.drag_gap_cache.get(berth)
+        if gaps is None:
+            gaps = self.drag_gap_cache[berth] = self.berth_gap_index(berth, exclude=v_item)
+        
+        duration_h = max(1, round(v_item.rect().width() / self.pixels_per_hour))
+        drop_h = v_item.pos().x() / self.pixels_per_hour
+        start_h = gaps.nearest_fit(drop_h, duration_h)
+        if start_h is None or abs(start_h - drop_h) > self.snap_tolerance_h:
+            # No free slot near the drop: keep drag-to-cascade
+            if self.snap_ghost: self.snap_ghost.hide()
+            self.snap_target = None
+            return
+        
+        x, y = start_h * self.pixels_per_hour, term_idx * self.row_height + 10
+        if not self.snap_ghost:
+            self.snap_ghost = QGraphicsRectItem()
+            self.snap_ghost.setPen(QPen(QColor("#9ece6a"), 2, Qt.DashLine))
+            self.snap_ghost.setBrush(QBrush(QColor(158, 206, 106, 60)))
+            self.snap_ghost.setZValue(40) # Over vessels (translucent), below edges
+            self.snap_ghost.setAcceptedMouseButtons(Qt.NoButton)
+            self.scene.addItem(self.snap_ghost)
+        self.snap_ghost.setRect(x, y, duration_h * self.pixels_per_hour, self.row_height - 20)
+        self.snap_ghost.show()
+        self.snap_target = (x, y)
+
+    def end_drag_snap(self, v_item):
+        """Mouse release: land on the snap slot (if any) and drop the per-drag cache"""
+        if self.snap_target:
+            v_item.setPos(*self.snap_target)
+        if self.snap_ghost:
+            self.scene.removeItem(self.snap_ghost)
+        self.snap_ghost = None; self.snap_target = None; self.drag_gap_cache = {}
+
+    def set_picked_vessel(self, v_item):
+        self.picked_vessel = v_item
+        if not hasattr(self, 'picked_label'): return
+        if v_item:
+            self.picked_label.setText(f"Picked Vessel: {v_item.data['모선명']} ({get_display_voyage(v_item.data['선사항차'])})")
+            hours = (v_item.data['etd'] - v_item.data['eta']).total_seconds() / 3600
+            self.window_duration_spin.setValue(max(1, round(hours)))
+        else:
+            self.picked_label.setText("Picked Vessel: -")
+
+    def berth_gap_index(self, berth, exclude=None):
+        """Free windows of a berth; cached until the berth's interval index changes"""
+        index = self.berth_index[berth]
+        if exclude is not None:
+            # Dragged / dropped vessel must not block its own slot
+            return BerthGapIndex([(self.hours_from_start(v.data['eta']), self.hours_from_start(v.data['etd'])) for v in index.items if v is not exclude],
+                                 self.safety_gap_h)
+        cached = self.gap_index_cache.get(berth)
+        if cached and cached[0] == index.version:
+            return cached[1]
+        gaps = BerthGapIndex([(self.hours_from_start(v.data['eta']), self.hours_from_start(v.data['etd'])) for v in index.items], self.safety_gap_h)
+        self.gap_index_cache[berth] = (index.version, gaps)
+        return gaps
+
+    def find_free_windows(self, duration_h, terminals=None, not_before=None, exclude=None, limit=5):
+        """Earliest free window per berth, best `limit` overall: [(start_h, full_berth, free_until_h)]"""
+        if not self.terminal_list or not hasattr(self, 'start_time'): return []
+        if not_before is None:
+            not_before = max(0, (datetime.now() - self.start_time).total_seconds() / 3600)
+        results = []
+        for berth in self.terminal_list:
+            if terminals and berth.split('-')[0] not in terminals: continue
+            excluded = exclude if exclude and exclude.data['full_berth'] == berth else None
+            gaps = self.berth_gap_index(berth, excluded)
+            fit = gaps.first_fit(duration_h, not_before)
+            if fit:
+                results.append((fit[0], berth, gaps.ends[fit[1]]))
+        return heapq.nsmallest(limit, results)
+
+    def on_find_free_windows(self):
+        terminals = {t.strip() for t in self.window_terminal_input.text().split(',') if t.strip()}
+        self.free_windows = self.find_free_windows(self.window_duration_spin.value(), terminals,
+                                                   exclude=self.picked_vessel)
+        self.window_table.setRowCount(0)
+        for start_h, berth, end_h in self.free_windows:
+            row = self.window_table.rowCount()
+            self.window_table.insertRow(row)
+            self.window_table.setItem(row, 0, QTableWidgetItem(berth))
+            self.window_table.setItem(row, 1, QTableWidgetItem(format_short_dt(self.start_time + timedelta(hours=start_h))))
+            until = "OPEN" if math.isinf(end_h) else format_short_dt(self.start_time + timedelta(hours=end_h))
+            self.window_table.setItem(row, 2, QTableWidgetItem(until))
+
+    def jump_to_free_window(self, row, col):
+        if row >= len(self.free_windows): return
+        start_h, berth, _ = self.free_windows[row]
+        term_idx = self.terminal_list.index(berth)
+        self.gv.centerOn(QPointF(start_h * self.pixels_per_hour, (term_idx + 0.5) * self.row_height))
+
+    def drop_picked_vessel(self):
+        """Move the picked vessel into the selected (or first) free window"""
+        v_item = self.picked_vessel
+        if not v_item or not self.free_windows or v_item.scene() is not self.scene: return
+        row = max(0, self.window_table.currentRow())
+        if row >= len(self.free_windows): return
+        start_h, berth, _ = self.free_windows[row]
+        term_idx = self.terminal_list.index(berth)
+        v_item.setPos(start_h * self.pixels_per_hour, term_idx * self.row_height + 10)
+        self.handle_vessel_move(v_item)
+        self.gv.centerOn(v_item)
+        self.on_find_free_windows() # The window is taken now
+
     def create_settings_tab(self):
         self.tab_settings = QWidget()
         layout = QVBoxLayout(self.tab_settings)
@@ -2032,8 +3832,65 @@ class BerthMonitor(QMainWindow):
         
         # Connect signals
         self.rb_gray_on.toggled.connect(self.on_gray_mode_changed)
-        
+
+        # --- Time Scale Setting ---
+        scale_layout = QHBoxLayout()
+        scale_layout.addWidget(QLabel("Time Scale (px / hour, Ctrl + Wheel):"))
+        self.time_scale_spin = QDoubleSpinBox()
+        self.time_scale_spin.setDecimals(1)
+        self.time_scale_spin.setSingleStep(0.5)
+        self.time_scale_spin.setRange(self.min_pixels_per_hour, self.max_pixels_per_hour)
+        self.time_scale_spin.setValue(self.pixels_per_hour)
+        self.time_scale_spin.valueChanged.connect(self.set_time_scale)
+        scale_layout.addWidget(self.time_scale_spin)
+        scale_layout.addStretch()
+        gray_layout.addLayout(scale_layout)
+
+        # --- Congestion Heatmap Setting ---
+        gray_layout.addWidget(QLabel("Congestion Heatmap (occupancy / safety gap per berth-hour):"))
+        heat_layout = QHBoxLayout()
+        self.rb_heat_off = QRadioButton("OFF")
+        self.rb_heat_on = QRadioButton("ON")
+        self.rb_heat_off.setChecked(not self.heatmap_enabled)
+        self.rb_heat_on.setChecked(self.heatmap_enabled)
+        # Own button group: must not be exclusive with the Gray Mode radios in this box
+        self.heat_button_group = QButtonGroup(self)
+        self.heat_button_group.addButton(self.rb_heat_off)
+        self.heat_button_group.addButton(self.rb_heat_on)
+        heat_layout.addWidget(self.rb_heat_off)
+        heat_layout.addWidget(self.rb_heat_on)
+        heat_layout.addStretch()
+        gray_layout.addLayout(heat_layout)
+        self.rb_heat_on.toggled.connect(self.on_heatmap_changed)
+
         layout.addWidget(gray_group)
+
+        # --- Live Horizon Setting ---
+        live_group = QGroupBox("Live Horizon")
+        live_layout = QVBoxLayout(live_group)
+
+        live_label = QLabel(f"Live Window (now -{self.live_window_back_days}D ~ now +{self.live_window_ahead_days}D, "
+                            "departed calls archived):")
+        live_label.setWordWrap(True)
+        live_layout.addWidget(live_label)
+
+        live_toggle_layout = QHBoxLayout()
+        self.rb_live_off = QRadioButton("OFF")
+        self.rb_live_on = QRadioButton("ON")
+        self.rb_live_off.setChecked(not self.live_mode_enabled)
+        self.rb_live_on.setChecked(self.live_mode_enabled)
+        live_toggle_layout.addWidget(self.rb_live_off)
+        live_toggle_layout.addWidget(self.rb_live_on)
+        live_toggle_layout.addStretch()
+        live_layout.addLayout(live_toggle_layout)
+
+        self.live_history_label = QLabel("Archived calls: 0")
+        self.live_history_label.setStyleSheet("font-size: 11px; color: #565f89;")
+        live_layout.addWidget(self.live_history_label)
+
+        self.rb_live_on.toggled.connect(self.on_live_mode_changed)
+
+        layout.addWidget(live_group)
         
         # --- Terminal Array Setting ---
         term_group = QGroupBox("Terminal Array (Draw Order)")
@@ -2077,6 +3934,158 @@ class BerthMonitor(QMainWindow):
                 if isinstance(item, VesselItem):
                     item.update()
 
+    def on_heatmap_changed(self, enabled):
+        self.heatmap_enabled = enabled
+        if enabled:
+            self.build_heatmap_overlay()
+        elif self.heatmap_item:
+            self.scene.removeItem(self.heatmap_item)
+            self.heatmap_item = None
+
+    def build_heatmap_overlay(self):
+        if not self.heatmap_enabled or not self.vessel_items or not self.total_hours: return
+        if self.heatmap_item:
+            self.scene.removeItem(self.heatmap_item)
+        self.heatmap_item = HeatmapOverlayItem(len(self.terminal_list), self.total_hours)
+        self.heatmap_item.set_cell_size(self.pixels_per_hour, self.row_height)
+        self.scene.addItem(self.heatmap_item)
+        self.update_heatmap_rows(self.terminal_list)
+
+    def update_heatmap_rows(self, berths):
+        """Re-compute and patch only the rows of the given berths"""
+        if not self.heatmap_item: return
+        intervals = defaultdict(list)
+        for v in self.vessel_items:
+            if v.data['full_berth'] in berths:
+                intervals[v.data['full_berth']].append((v.data['eta'], v.data['etd']))
+        
+        for berth in berths:
+            if berth not in self.terminal_list: continue
+            occ_row, viol_row = berth_heat_row(intervals[berth], self.start_time, self.heatmap_item.hours, self.safety_gap_h)
+            cells = [3 if occ >= 2 else (2 if viol else min(occ, 1)) for occ, viol in zip(occ_row, viol_row)]
+            self.heatmap_item.set_row(self.terminal_list.index(berth), HeatmapOverlayItem.pack_row(cells, self.heatmap_palette))
+        self.heatmap_item.render()
+
+    def on_live_mode_changed(self, enabled):
+        self.live_mode_enabled = enabled
+        self.live_window_start = None
+        if not enabled:
+            self.restore_archived_calls()
+        self.update_table()
+        self.draw_graphic()
+
+    def get_live_window(self):
+        """(start, end) of the live horizon. Start snaps to midnight so the window slides once a day."""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=self.live_window_back_days)
+        end = today + timedelta(days=self.live_window_ahead_days + 1)
+        return start, end
+
+    def archive_departed_calls(self, port, cutoff):
+        """Move calls that departed before cutoff into the compact history store"""
+        kept = []
+        archived = set()
+        for d in port.vessel_data_list:
+            if d['etd'] < cutoff:
+                port.history_data.append(d)
+                archived.add(d['uid'])
+            else:
+                kept.append(d)
+        
+        if archived:
+            # In-place so App references (self.vessel_data_list) stay valid
+            port.vessel_data_list[:] = kept
+            # auto_connections are indices into vessel_data_list -> rebuild
+            self.detect_auto_connections(port)
+            self.prune_archived_links(port.code, archived)
+        
+        self.update_history_label()
+        return len(archived)
+
+    def restore_archived_calls(self):
+        """Live mode off: put every port's archived calls back (uid order = paste order)"""
+        restored = False
+        for port in self.ports.values():
+            if not port.history_data: continue
+            port.vessel_data_list.extend(port.history_data)
+            port.vessel_data_list.sort(key=lambda d: d['uid'])
+            port.history_data = []
+            self.detect_auto_connections(port)
+            restored = True
+        self.update_history_label()
+        if restored:
+            self.schedule_rotation_chains() # Archived calls rejoin their rotations
+
+    def prune_archived_links(self, code, uids):
+        """Drop the TS links (in-port and cross-port) and rotation legs of calls archived from port `code`"""
+        if self.prune_ts_links(self.ports[code], uids) and code == self.active_port_code:
+            self.refresh_ts_table()
+        self.drop_cross_port_ts(code, uids)
+        chains = [[(c, d) for c, d in chain if c != code or d['uid'] not in uids] for chain in self.rotation_chains]
+        self.rotation_chains = [chain for chain in chains if len(chain) >= 2]
+        self.rotation_by_uid = {(c, d['uid']): idx for idx, chain in enumerate(self.rotation_chains) for c, d in chain}
+        self.evaluate_rotations()
+
+    def update_history_label(self):
+        if hasattr(self, 'live_history_label'):
+            total = sum(len(p.history_data) for p in self.ports.values())
+            self.live_history_label.setText(f"Archived calls: {total}")
+
+    def slide_live_window(self):
+        if not self.live_mode_enabled: return
+        start, _ = self.get_live_window()
+        if start == self.live_window_start: return
+
+        # Day rolled over: archive in every port, then rebuild the active view
+        for port in self.ports.values():
+            self.archive_departed_calls(port, start)
+        self.update_table()
+        self.draw_graphic()
+
+    def set_time_scale(self, pixels_per_hour):
+        """Semantic zoom: re-position existing items in one pass (no draw_graphic rebuild)"""
+        pixels_per_hour = max(self.min_pixels_per_hour, min(self.max_pixels_per_hour, pixels_per_hour))
+        old_scale = self.pixels_per_hour
+        if abs(pixels_per_hour - old_scale) < 1e-9: return
+        self.pixels_per_hour = pixels_per_hour
+
+        # Keep Settings control in sync (Ctrl + Wheel path)
+        if hasattr(self, 'time_scale_spin') and abs(self.time_scale_spin.value() - pixels_per_hour) > 0.05:
+            self.time_scale_spin.blockSignals(True)
+            self.time_scale_spin.setValue(pixels_per_hour)
+            self.time_scale_spin.blockSignals(False)
+
+        if not hasattr(self, 'start_time') or not self.vessel_items: return
+        ratio = pixels_per_hour / old_scale
+
+        # 1. Vessels: x/width straight from ETA/ETD
+        for item in self.vessel_items:
+            item.apply_time_scale(self.start_time, pixels_per_hour)
+
+        # 2. Time axis decorations: x is linear in hours from start_time, so scale by ratio
+        for item in self.time_axis_items:
+            if isinstance(item, QGraphicsLineItem):
+                line = item.line()
+                item.setLine(line.x1() * ratio, line.y1(), line.x2() * ratio, line.y2())
+            elif isinstance(item, QGraphicsRectItem):
+                r = item.rect()
+                item.setRect(r.x() * ratio, r.y(), r.width() * ratio, r.height())
+            elif isinstance(item, QGraphicsTextItem):
+                # Labels are centered on their anchor -> keep the center, not the left edge
+                half_w = item.boundingRect().width() / 2
+                item.setPos((item.pos().x() + half_w) * ratio - half_w, item.pos().y())
+
+        # 3. Lines that follow vessels / overlays
+        if self.edge_layer:
+            self.edge_layer.refresh_all()
+        if self.heatmap_item:
+            self.heatmap_item.set_cell_size(pixels_per_hour, self.row_height)
+        if self.drop_cost_item:
+            self.drop_cost_item.set_cell_size(pixels_per_hour, self.row_height)
+
+        self.update_current_time_display()
+        self.scene.setSceneRect(self.scene.itemsBoundingRect())
+
     def on_terminal_order_changed(self):
         text = self.term_order_input.toPlainText().strip()
         new_order = [line.strip() for line in text.split('\n') if line.strip()]
@@ -2113,20 +4122,7 @@ class BerthMonitor(QMainWindow):
                 p_obj.original_vessel_data.sort(key=lambda d: (get_sort_key(d.get('full_berth', '')), d.get('eta', datetime.min)))
             
             # 1.5 Detect Duplicates (Same Vessel Name + Voyage)
-            from collections import defaultdict
-            p_obj.auto_connections = []
-            if p_obj.vessel_data_list:
-                dupes_map = defaultdict(list)
-                for i, d in enumerate(p_obj.vessel_data_list):
-                    v_name = d.get('모선명', '').strip()
-                    v_voy = d.get('선사항차', '').strip()
-                    if v_name and v_voy:
-                        dupes_map[(v_name, v_voy)].append(i)
-                
-                for key, indices in dupes_map.items():
-                    if len(indices) >= 2:
-                        for idx_in_sub in range(len(indices) - 1):
-                            p_obj.auto_connections.append((indices[idx_in_sub], indices[idx_in_sub+1]))
+            self.detect_auto_connections(p_obj)
         
         # 2. Update Active View references
         active_port = self.ports.get(self.active_port_code)
@@ -2134,6 +4130,26 @@ class BerthMonitor(QMainWindow):
             self.terminal_list = active_port.terminal_list
             self.vessel_data_list = active_port.vessel_data_list
 
+    def new_vessel_uid(self):
+        """Stable vessel identity (kept by deepcopy -> survives reset/redraw)"""
+        self.vessel_uid_seq += 1
+        return self.vessel_uid_seq
+
+    def detect_auto_connections(self, p_obj):
+        p_obj.auto_connections = []
+        if p_obj.vessel_data_list:
+            dupes_map = defaultdict(list)
+            for i, d in enumerate(p_obj.vessel_data_list):
+                v_name = d.get('모선명', '').strip()
+                v_voy = d.get('선사항차', '').strip()
+                if v_name and v_voy:
+                    dupes_map[(v_name, v_voy)].append(i)
+            
+            for key, indices in dupes_map.items():
+                if len(indices) >= 2:
+                    for idx_in_sub in range(len(indices) - 1):
+                        p_obj.auto_connections.append((indices[idx_in_sub], indices[idx_in_sub+1]))
+
     def perform_search(self):
         # 1. Reset Previous
         self.clear_search(clear_input=False)
@@ -2388,6 +4404,8 @@ class BerthMonitor(QMainWindow):
         # Auto-save everything
         self.auto_save_mappings()
         self.auto_save_memos()
+        if self.process_pool:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
         QApplication.quit()
 
 
@@ -2524,56 +4542,214 @@ class BerthMonitor(QMainWindow):
                 item.toggle_highlight_effect()
                 
         # 2. Remove Arrows
-        items_to_remove = [item for item in self.scene.items() 
-                           if isinstance(item, QGraphicsLineItem) and item.data(0) == "ARROW"]
-        for item in items_to_remove:
-            self.scene.removeItem(item)
+        if self.edge_layer:
+            self.edge_layer.remove_edges('TS')
             
         # 3. Clear TS Table
         self.ts_table.setRowCount(0)
         self.ts_table.clearSpans()
-        self.ts_connections = {}
+        port = self.ports[self.active_port_code]
+        port.clear_ts()
+        self.ts_connections = port.ts_connections
+        self.ts_group_rows = {}
 
     def add_ts_connection(self, load_vessel, disch_vessel, color):
-        if load_vessel not in self.ts_connections:
-            self.ts_connections[load_vessel] = []
+        load_uid, disch_uid = load_vessel.data['uid'], disch_vessel.data['uid']
+        if load_uid not in self.ts_connections:
+            self.ts_connections[load_uid] = []
         
         # Check if already exists to prevent dupes if logic allows multiple arrows (though mouseRelease blocks self)
         # Assuming one arrow per pair for now.
         # But we simply append for the view.
-        self.ts_connections[load_vessel].append((disch_vessel, color))
+        self.ts_connections[load_uid].append((disch_uid, color))
+        self.ports[self.active_port_code].index_ts_pair(disch_uid, load_uid)
+        self.refresh_ts_table()
+
+    def parse_ts_rules(self):
+        """'DISCH_KEY LOAD_KEY' lines -> [(disch_key, load_key)]"""
+        rules = []
+        for line in self.ts_rules_input.toPlainText().splitlines():
+            parts = line.split()
+            if len(parts) == 2:
+                rules.append((parts[0], parts[1]))
+            elif parts:
+                print(f"Invalid TS rule line: {line}")
+        return rules
+
+    def set_auto_ts_pairs(self, remove, add):
+        """Swap engine-found pairs: drop `remove`, add `add` ({(disch_uid, load_uid)}), then redraw the table once"""
+        port = self.ports[self.active_port_code]
+        for disch_uid, load_uid in remove:
+            port.ts_auto_pairs.discard((disch_uid, load_uid))
+            port.unindex_ts_pair(disch_uid, load_uid)
+            disch_list = self.ts_connections.get(load_uid)
+            if disch_list is not None:
+                disch_list[:] = [(d, c) for d, c in disch_list if d != disch_uid]
+                if not disch_list: del self.ts_connections[load_uid]
+            if self.edge_layer:
+                self.edge_layer.remove_edge_between('TS', disch_uid, load_uid)
+        
+        for disch_uid, load_uid in add:
+            disch_vessel = self.vessel_item_map.get(disch_uid)
+            load_vessel = self.vessel_item_map.get(load_uid)
+            if disch_vessel is None or load_vessel is None: continue
+            color = ts_status_color(disch_vessel.data['eta'], disch_vessel.data['etd'],
+                                    load_vessel.data['eta'], load_vessel.data['etd'])
+            port.ts_auto_pairs.add((disch_uid, load_uid))
+            port.index_ts_pair(disch_uid, load_uid)
+            self.ts_connections.setdefault(load_uid, []).append((disch_uid, color))
+            if self.edge_layer:
+                self.edge_layer.add_edge('TS', disch_uid, load_uid, color)
         self.refresh_ts_table()
 
+    def run_auto_ts(self):
+        """Find every feasible TS pair of the active port for the pairing rules"""
+        port = self.ports[self.active_port_code]
+        rules = self.parse_ts_rules()
+        if not rules: return
+        dwell = timedelta(hours=self.ts_dwell_spin.value())
+        port.ts_auto_rules = (rules, dwell)
+        vessels = [v.data for v in self.vessel_items]
+        pairs = find_ts_pairs(vessels, vessels, rules, dwell)
+        self.set_auto_ts_pairs(set(port.ts_auto_pairs), pairs)
+        self.ts_status_label.setText(f"{len(pairs)} TS pairs")
+
+    def update_auto_ts(self, v_item):
+        """After a move: re-join only the moved vessel, both as discharging and as loading vessel,
+        against the calls the berth indexes return for its window widened by the yard dwell"""
+        port = self.ports[self.active_port_code]
+        if not port.ts_auto_rules: return
+        rules, dwell = port.ts_auto_rules
+        data = v_item.data
+        uid = data['uid']
+        # Closed-interval join vs the index's open overlap query -> pad by a minute
+        t0 = data['eta'] - dwell - timedelta(minutes=1)
+        t1 = data['etd'] + dwell + timedelta(minutes=1)
+        candidates = [v.data for berth in self.terminal_list for v in self.berth_index[berth].overlapping(t0, t1)]
+        pairs = find_ts_pairs([data], candidates, rules, dwell) | find_ts_pairs(candidates, [data], rules, dwell)
+        old = {pair for pair in port.ts_pairs_by_vessel.get(uid, ()) if pair in port.ts_auto_pairs}
+        if pairs == old: return
+        self.set_auto_ts_pairs(old, pairs)
+        self.ts_status_label.setText(f"{len(port.ts_auto_pairs)} TS pairs")
+
+    def clear_auto_ts(self):
+        port = self.ports[self.active_port_code]
+        self.set_auto_ts_pairs(set(port.ts_auto_pairs), set())
+        port.ts_auto_rules = None
+        self.ts_status_label.setText("")
+
+    def refresh_ts_status(self, berths):
+        """Re-classify the TS links of vessels on the given berths (after moves / cascades).
+        Only links whose color changed are touched: arrow recolored, and the
+        rows of its load vessel re-sorted in place."""
+        port = self.ports[self.active_port_code]
+        pairs = set()
+        for berth in berths:
+            for v in self.berth_index[berth].items:
+                pairs.update(port.ts_pairs_by_vessel.get(v.data['uid'], ()))
+        if not pairs: return
+        data_by_uid = {d['uid']: d for d in self.vessel_data_list} # Drawn or filtered out
+        
+        changed_loads = set()
+        for disch_uid, load_uid in pairs:
+            disch = data_by_uid.get(disch_uid)
+            load = data_by_uid.get(load_uid)
+            if disch is None or load is None: continue
+            color = ts_status_color(disch['eta'], disch['etd'], load['eta'], load['etd'])
+            disch_list = self.ts_connections.get(load_uid, [])
+            for i, (d, old_color) in enumerate(disch_list):
+                if d == disch_uid and old_color.name() != color.name():
+                    disch_list[i] = (d, color)
+                    changed_loads.add(load_uid)
+                    if self.edge_layer:
+                        self.edge_layer.set_edge_color('TS', disch_uid, load_uid, color)
+        
+        for load_uid in changed_loads:
+            start_row = self.ts_group_rows.get(load_uid)
+            if start_row is None: continue
+            disch_list = self.ts_connections[load_uid]
+            disch_list.sort(key=lambda x: ts_color_priority(x[1]))
+            rows = [(data_by_uid.get(disch_uid), color) for disch_uid, color in disch_list]
+            if any(disch is None for disch, _ in rows):
+                self.refresh_ts_table() # A call is gone: rebuild (drops its links)
+                return
+            for i, (disch, color) in enumerate(rows):
+                self.set_ts_disch_cell(start_row + i, disch, color)
+
+    def reclassify_port_ts(self, port):
+        """Re-color every TS link of a port that is not on screen from its data"""
+        data_by_uid = {d['uid']: d for d in port.vessel_data_list}
+        for load_uid, disch_list in port.ts_connections.items():
+            load = data_by_uid.get(load_uid)
+            if load is None: continue
+            for i, (disch_uid, _) in enumerate(disch_list):
+                disch = data_by_uid.get(disch_uid)
+                if disch is None: continue
+                disch_list[i] = (disch_uid, ts_status_color(disch['eta'], disch['etd'], load['eta'], load['etd']))
+
+    def restore_ts_edges(self):
+        """Re-create every TS arrow of the active port on a fresh edge layer (stored colors, no re-classification)"""
+        self.edge_layer.add_edges('TS', [(disch_uid, load_uid, color)
+                                         for load_uid, disch_list in self.ts_connections.items()
+                                         for disch_uid, color in disch_list])
+
+    def set_ts_disch_cell(self, row, disch, color):
+        """DISCH VESSEL cell: name in a box colored by TS status"""
+        disch_voy = get_display_voyage(disch['선사항차'])
+        disch_display = f"{disch['모선명']} ({disch_voy})"
+
+        container = QWidget()
+        layout = QHBoxLayout(container)
+        layout.setContentsMargins(2, 2, 2, 2)
+        lbl = QLabel(disch_display)
+        lbl.setAlignment(Qt.AlignCenter)
+        
+        # Convert QColor to hex string
+        color_hex = color.name()
+        lbl.setStyleSheet(f"border: 2px solid {color_hex}; color: {color_hex}; font-weight: bold; background: #282a36; border-radius: 4px;")
+        
+        layout.addWidget(lbl)
+        self.ts_table.setCellWidget(row, 1, container)
+
+    def prune_ts_links(self, port, uids):
+        """Drop the TS links of calls that left the port data (and their arrows if on screen)"""
+        dropped = port.prune_ts(uids)
+        if port.code == self.active_port_code and self.edge_layer:
+            for disch_uid, load_uid in dropped:
+                self.edge_layer.remove_edge_between('TS', disch_uid, load_uid)
+        return dropped
+
     def refresh_ts_table(self):
         self.ts_table.setRowCount(0)
         self.ts_table.clearSpans()
+        self.ts_group_rows = {} # load uid -> first row (status refresh re-renders in place)
+        data_by_uid = {d['uid']: d for d in self.vessel_data_list}
+        # Links to calls that no longer exist are dropped, not shown
+        dead = {uid for load_uid, disch_list in self.ts_connections.items()
+                for uid in [load_uid] + [d for d, _ in disch_list] if uid not in data_by_uid}
+        if dead:
+            self.prune_ts_links(self.ports[self.active_port_code], dead)
         
-        # Sorting Priority: Red (#ff0000) -> Green (#00ff00) -> Blue (#0088ff)
-        def get_color_priority(color):
-            nm = color.name().lower()
-            if nm == "#ff0000": return 0
-            if nm == "#00ff00": return 1
-            if nm == "#0088ff": return 2
-            return 3
-
         current_row = 0
         
-        for load_vessel, disch_list in self.ts_connections.items():
-            # Sort discharge vessels
-            disch_list.sort(key=lambda x: get_color_priority(x[1]))
+        for load_uid, disch_list in self.ts_connections.items():
+            # Sorting Priority: Red (#ff0000) -> Green (#00ff00) -> Blue (#0088ff)
+            disch_list.sort(key=lambda x: ts_color_priority(x[1]))
             
             count = len(disch_list)
+            load = data_by_uid[load_uid]
             if count == 0: continue
             
             start_row = current_row
-            
+            self.ts_group_rows[load_uid] = start_row
+
             # Add Rows
             for i in range(count):
                 self.ts_table.insertRow(current_row + i)
                 
             # Populate LOAD VESSEL (Merged)
-            load_voy = get_display_voyage(load_vessel.data['선사항차'])
-            load_display = f"{load_vessel.data['모선명']} ({load_voy})"
+            load_voy = get_display_voyage(load['선사항차'])
+            load_display = f"{load['모선명']} ({load_voy})"
             
             load_item = QTableWidgetItem(load_display)
             load_item.setTextAlignment(Qt.AlignCenter)
@@ -2583,24 +4759,9 @@ class BerthMonitor(QMainWindow):
                 self.ts_table.setSpan(start_row, 0, count, 1)
                 
             # Populate DISCH VESSELS
-            for i, (disch_vessel, color) in enumerate(disch_list):
-                r = start_row + i
-                disch_voy = get_display_voyage(disch_vessel.data['선사항차'])
-                disch_display = f"{disch_vessel.data['모선명']} ({disch_voy})"
-                
-                container = QWidget()
-                layout = QHBoxLayout(container)
-                layout.setContentsMargins(2, 2, 2, 2)
-                lbl = QLabel(disch_display)
-                lbl.setAlignment(Qt.AlignCenter)
-                
-                # Convert QColor to hex string
-                color_hex = color.name()
-                lbl.setStyleSheet(f"border: 2px solid {color_hex}; color: {color_hex}; font-weight: bold; background: #282a36; border-radius: 4px;")
-                
-                layout.addWidget(lbl)
-                self.ts_table.setCellWidget(r, 1, container)
-                
+            for i, (disch_uid, color) in enumerate(disch_list):
+                self.set_ts_disch_cell(start_row + i, data_by_uid[disch_uid], color)
+
             current_row += count
             
 
@@ -2724,9 +4885,12 @@ class BerthMonitor(QMainWindow):
         port.vessel_data_list = copy.deepcopy(port.original_vessel_data)
         
         # 4. Clear Logs ONLY
-        port.master_log_data = []
-        port.slave_log_data = []
-        port.ts_connections = {}
+        port.master_log_data.clear()
+        port.slave_log_data.clear()
+        port.clear_ts()
+        port.history_data = [] # Departed calls are restored -> re-archived by the Live Horizon
+        port.cascade_origin = {}
+        port.user_placed = set()
         # auto_connections are not cleared (found at paste time)
         
         # 5. Sync App References
@@ -2737,6 +4901,7 @@ class BerthMonitor(QMainWindow):
         
         # 6. Stabilization: re-run terminal sorting
         self.sort_terminals()
+        port.rebuild_original_index() # Copies are gone
         
         # 7. Refresh UI
         self.repopulate_logs()
@@ -2744,6 +4909,8 @@ class BerthMonitor(QMainWindow):
         self.refresh_ts_table()
         self.update_table()
         self.draw_graphic()
+        self.drop_cross_port_ts(self.active_port_code)
+        self.schedule_rotation_chains()
 
     def paste_data(self, target_port_code=None):
         text = QApplication.clipboard().text()
@@ -2847,6 +5014,10 @@ class BerthMonitor(QMainWindow):
                 new_list.append(d)
                 berths.add(d['full_berth'])
             
+        # Stable identity per call (edges, indexes)
+        for d in new_list:
+            d['uid'] = self.new_vessel_uid()
+        
         # Update SPECIFIC Port Data
         port.vessel_data_list = new_list
         port.terminal_list = list(berths)
@@ -2855,11 +5026,15 @@ class BerthMonitor(QMainWindow):
         
         # Apply custom terminal sort
         self.sort_terminals()
+        port.rebuild_original_index()
         
         # Reset Logs for that port
-        port.master_log_data = []
-        port.slave_log_data = []
-        port.ts_connections = {}
+        port.master_log_data.clear()
+        port.slave_log_data.clear()
+        port.clear_ts()
+        port.history_data = []
+        port.cascade_origin = {}
+        port.user_placed = set()
         
         # If updating ACTIVE port, refresh UI
         if code == self.active_port_code:
@@ -2886,10 +5061,13 @@ class BerthMonitor(QMainWindow):
             
             self.reset_btn.setEnabled(True)
             self.repopulate_logs()
+            self.refresh_ts_table() # Old links went with the old calls
             self.update_table()
             self.draw_graphic()
         else:
             print(f"Pasted data to {code} (Background)")
+        self.drop_cross_port_ts(code)
+        self.schedule_rotation_chains()
 
     def update_table(self):
         self.table.setRowCount(len(self.vessel_data_list))
@@ -2903,14 +5081,39 @@ class BerthMonitor(QMainWindow):
         self.current_time_text = None
         self.current_time_box = None
         self.current_time_line = None
+        self.time_axis_items = []
+        self.heatmap_item = None
+        self.edge_layer = None
+        self.scene.edge_layer = None
+        self.vessel_item_map = {}
+        self.berth_index = defaultdict(BerthIntervalIndex)
+        self.in_port_items = set()
+        self.gap_index_cache = {}
+        self.set_picked_vessel(None)
+        self.free_windows = [] # Hours are relative to the old start_time
+        self.snap_ghost = None; self.snap_target = None; self.drag_gap_cache = {}
+        self.cancel_drop_cost(); self.drop_cost_item = None
+        self.preview_timer.stop(); self.preview_item = None; self.preview_cache = {}; self.preview_ghosts = []
+        if hasattr(self, 'window_table'): self.window_table.setRowCount(0)
         if not self.vessel_data_list: return
         
-        min_eta = min(d['eta'] for d in self.vessel_data_list) - timedelta(days=2)
-        max_etd = max(d['etd'] for d in self.vessel_data_list) + timedelta(days=2)
-        min_eta = min_eta.replace(hour=0, minute=0, second=0)
+        window_end = None
+        if self.live_mode_enabled:
+            # Live Horizon: fixed sliding window, departed calls go to history
+            min_eta, window_end = self.get_live_window()
+            max_etd = window_end
+            self.live_window_start = min_eta
+            if self.archive_departed_calls(self.ports[self.active_port_code], min_eta):
+                self.update_table()
+            if not self.vessel_data_list: return
+        else:
+            min_eta = min(d['eta'] for d in self.vessel_data_list) - timedelta(days=2)
+            max_etd = max(d['etd'] for d in self.vessel_data_list) + timedelta(days=2)
+            min_eta = min_eta.replace(hour=0, minute=0, second=0)
         self.start_time = min_eta
         
         total_hours = int((max_etd - min_eta).total_seconds() / 3600)
+        self.total_hours = total_hours
         canvas_width = total_hours * self.pixels_per_hour
         canvas_height = len(self.terminal_list) * self.row_height
         
@@ -2936,6 +5139,7 @@ class BerthMonitor(QMainWindow):
             sim_bg = self.scene.addRect(0, y, canvas_width, self.row_height, 
                                         QPen(Qt.NoPen), QBrush(sim_bg_color))
             sim_bg.setZValue(-11)
+            self.time_axis_items.append(sim_bg)
             
             # Split Terminal-Berth for better display
             pen_color = QColor("#414868")
@@ -2948,11 +5152,12 @@ class BerthMonitor(QMainWindow):
             elif i == 0:
                 pen_width = 2
                 
-            self.scene.addLine(0, y, canvas_width, y, QPen(pen_color, pen_width))
+            self.time_axis_items.append(self.scene.addLine(0, y, canvas_width, y, QPen(pen_color, pen_width)))
             last_terminal = t_name
         
         # Final Bottom Line
-        self.scene.addLine(0, canvas_height, canvas_width, canvas_height, QPen(QColor("#7aa2f7"), 3))
+        self.time_axis_items.append(
+            self.scene.addLine(0, canvas_height, canvas_width, canvas_height, QPen(QColor("#7aa2f7"), 3)))
 
         # Time Grid (X-axis)
         day_width = 24 * self.pixels_per_hour
@@ -2973,6 +5178,7 @@ class BerthMonitor(QMainWindow):
                     weekend_bg = self.scene.addRect(x, -70, day_width, 20, 
                                                    QPen(Qt.NoPen), QBrush(QColor("#f7768e")))
                     weekend_bg.setZValue(-5)
+                    self.time_axis_items.append(weekend_bg)
                 
                 # Date Label (Centered)
                 date_str = curr_time.strftime("%m / %d (%a)")
@@ -2985,6 +5191,7 @@ class BerthMonitor(QMainWindow):
                 
                 label_w = d_label.boundingRect().width()
                 d_label.setPos(x + (day_width/2) - (label_w/2), -70)
+                self.time_axis_items.append(d_label)
             elif h % 12 == 0: # 12h
                 pen.setWidth(2); pen.setColor(QColor("#444b6a"))
                 is_header_safe = False 
@@ -2996,7 +5203,7 @@ class BerthMonitor(QMainWindow):
                 pen.setColor(QColor("#1f2335"))
 
             # Grid line drawing
-            self.scene.addLine(x, -60 if is_header_safe else 0, x, canvas_height, pen)
+            self.time_axis_items.append(self.scene.addLine(x, -60 if is_header_safe else 0, x, canvas_height, pen))
             
             # Specific Labels (6, 12, 18)
             if curr_time.hour in [6, 12, 18]:
@@ -3006,6 +5213,7 @@ class BerthMonitor(QMainWindow):
                 # Center text horizontally on the grid line
                 label_w = t_label.boundingRect().width()
                 t_label.setPos(x - (label_w / 2), -30)
+                self.time_axis_items.append(t_label)
 
         # Vessels
         self.vessel_items = []
@@ -3014,6 +5222,8 @@ class BerthMonitor(QMainWindow):
         for d in self.vessel_data_list:
             # FILTER CHECK (Hierarchical)
             if (d.get('선사'), d.get('항로')) not in self.allowed_pairs: continue
+            # LIVE WINDOW CHECK (only materialize calls inside the horizon)
+            if window_end is not None and (d['eta'] > window_end or d['etd'] < min_eta): continue
             
             term_idx = self.terminal_list.index(d['full_berth'])
             y = term_idx * self.row_height + 10
@@ -3029,36 +5239,41 @@ class BerthMonitor(QMainWindow):
                 
             self.scene.addItem(item)
             self.vessel_items.append(item)
+            self.vessel_item_map[d['uid']] = item
+            self.berth_index[d['full_berth']].add(item)
+        
+        # Sub-lanes for overlapping vessels (all berths)
+        self.pack_berth_lanes()
 
-        # 4. DRAW AUTO-CONNECTIONS (Duplicates)
+        # 4. EDGE LAYER (single item for all vessel-to-vessel lines)
+        self.edge_layer = EdgeLayerItem(self.vessel_item_map)
+        self.scene.addItem(self.edge_layer)
+        self.scene.edge_layer = self.edge_layer
+        
+        # DRAW AUTO-CONNECTIONS (Duplicates)
         port = self.ports[self.active_port_code]
         for idx1, idx2 in port.auto_connections:
             # Note: idx1 and idx2 are indices into vessel_data_list
-            # Since we only created items for those NOT filtered out, we need to be careful.
-            # However, usually duplicates share similar properties (Line/Route), so they likely pass filters together.
-            # Let's find the items by their data reference.
-            v_item1 = None
-            v_item2 = None
-            d1 = self.vessel_data_list[idx1]
-            d2 = self.vessel_data_list[idx2]
-            
-            for item in self.vessel_items:
-                if item.data is d1: v_item1 = item
-                if item.data is d2: v_item2 = item
+            # Items filtered out are simply missing from vessel_item_map.
+            v_item1 = self.vessel_item_map.get(self.vessel_data_list[idx1]['uid'])
+            v_item2 = self.vessel_item_map.get(self.vessel_data_list[idx2]['uid'])
             
             if v_item1 and v_item2:
                 v_item1.is_duplicate = True
                 v_item2.is_duplicate = True
                 
-                # Draw Lavender Connection Line (Simplified Arrow or just Line)
-                # Reuse ConnectionLineItem but with Lavender color
-                conn_line = ConnectionLineItem(v_item1, v_item2)
-                conn_line.setPen(QPen(QColor("#bfabff"), 3, Qt.DashLine))
-                conn_line.label.setDefaultTextColor(QColor("#bfabff"))
-                self.scene.addItem(conn_line)
+                # Draw Lavender Connection Line
+                self.edge_layer.add_edge('DUP', v_item1.data['uid'], v_item2.data['uid'])
+        
+        # TS arrows (links are kept by uid in PortData)
+        self.restore_ts_edges()
+
+        # Congestion Heatmap (optional)
+        self.build_heatmap_overlay()
 
         # Current Time Display
         self.update_current_time_display()
+        self.scene.setSceneRect(self.scene.itemsBoundingRect())
 
 
     def update_current_time_display(self):
@@ -3121,18 +5336,18 @@ class BerthMonitor(QMainWindow):
             self.current_time_line.setZValue(500)
             self.scene.addItem(self.current_time_line)
             
-        # 6. Highlight Vessels currently in port (where line_x is inside vessel rect)
+        # 6. Highlight Vessels currently in port (time-point query per berth)
         if hasattr(self, 'vessel_items') and self.vessel_items:
-            for v_item in self.vessel_items:
-                # Check if current time is between ETA and ETD
-                if v_item.data['eta'] <= now <= v_item.data['etd']:
-                    if not v_item.is_in_port:
-                        v_item.is_in_port = True
-                        v_item.update()
-                else:
-                    if v_item.is_in_port:
-                        v_item.is_in_port = False
-                        v_item.update()
+            in_port = set()
+            for index in self.berth_index.values():
+                in_port.update(index.at(now))
+            for v_item in in_port - self.in_port_items:
+                v_item.is_in_port = True
+                v_item.update()
+            for v_item in self.in_port_items - in_port:
+                v_item.is_in_port = False
+                v_item.update()
+            self.in_port_items = in_port
         
         # Add to scene
         self.scene.addItem(self.current_time_box)
@@ -3228,61 +5443,49 @@ class BerthMonitor(QMainWindow):
             
         self.memo_ticker.set_text_segments(memo_segments)
 
-    def get_original_data(self, current_data):
-        key_name = current_data['모선명']
-        key_voy = current_data['선사항차']
-        
-        # Search in original_vessel_data
-        for orig in self.original_vessel_data:
-            if orig['모선명'] == key_name and orig['선사항차'] == key_voy:
-                return orig
+    def get_original_data(self, current_data, port=None):
+        port = port or self.ports.get(self.active_port_code)
+        if not port: return None
+        
+        # Hash lookup by uid, name+voyage only for calls without one
+        orig = port.original_index.get(current_data.get('uid'))
+        if orig is None:
+            orig = port.original_by_key.get((current_data['모선명'], current_data['선사항차']))
+        return orig
+
+    def vessel_at(self, scene_pos, exclude=None):
+        """VesselItem under a scene point: berth row from y, then a time-point query"""
+        if not self.terminal_list or not hasattr(self, 'start_time'): return None
+        row = int(scene_pos.y() // self.row_height)
+        if not 0 <= row < len(self.terminal_list): return None
+        t = self.start_time + timedelta(hours=scene_pos.x() / self.pixels_per_hour)
+        for v in self.berth_index[self.terminal_list[row]].at(t):
+            # Sub-lanes share the time range -> confirm with the item rect
+            if v is not exclude and v.sceneBoundingRect().contains(scene_pos):
+                return v
         return None
 
-    def update_log_entry(self, log_list, entry_key, new_entry):
-        # Entry Key: Unique Key (e.g. "VesselName|Voyage")
-        
-        # Add key to new_entry if provided (helper)
-        if new_entry:
-             new_entry['log_key'] = entry_key
-        
-        # Extract vessel name and voyage from the key for backward compatibility
-        # entry_key format: "Name|Voyage"
-        if '|' in entry_key:
-            vessel_name, vessel_voyage = entry_key.split('|', 1)
-            # Construct the display text that would appear in legacy entries
-            # Format: "Name (DisplayVoyage)"
-            vessel_display = f"{vessel_name} ({get_display_voyage(vessel_voyage)})"
-        else:
-            vessel_display = entry_key
-        
-        # Strategy: Find ALL indices with this key (to handle legacy dupes)
-        indices = []
-        for i, log in enumerate(log_list):
-            # Match using multiple criteria:
-            # 1. New style: log_key field
-            # 2. Old style master: vessel_text field
-            # 3. Old style slave: name field
-            if (log.get('log_key') == entry_key or 
-                log.get('vessel_text') == vessel_display or 
-                log.get('name') == vessel_display):
-                indices.append(i)
-        
-        # Determine insertion point (first found index or end)
-        insert_idx = indices[0] if indices else len(log_list)
-        
-        # Remove ALL existing entries for this key (reverse order to keep indices valid)
-        for i in sorted(indices, reverse=True):
-            log_list.pop(i)
-            
-        # Re-Insert if new_entry exists
-        if new_entry:
-            # Check range
-            if insert_idx > len(log_list): insert_idx = len(log_list)
-            log_list.insert(insert_idx, new_entry)
+    def pack_berth_lanes(self, berths=None):
+        """Assign sub-lanes so overlapping vessels on a berth are stacked, not hidden.
+        berths: only re-pack these berths (None = all)"""
+        groups = defaultdict(list)
+        for v in self.vessel_items:
+            if berths is None or v.data['full_berth'] in berths:
+                groups[v.data['full_berth']].append(v)
+        
+        full_height = self.row_height - 20
+        for berth, items in groups.items():
+            if berth not in self.terminal_list: continue
+            base_y = self.terminal_list.index(berth) * self.row_height + 10
+            lanes, lane_counts = assign_sub_lanes([(v.data['eta'], v.data['etd']) for v in items])
+            for v, lane, count in zip(items, lanes, lane_counts):
+                lane_h = full_height / count
+                v.apply_lane_geometry(base_y + lane * lane_h, lane_h)
 
     def handle_vessel_move(self, master_item):
-        new_y = master_item.pos().y()
-        term_idx = max(0, min(round(new_y / self.row_height), len(self.terminal_list) - 1))
+        # Berth row from the vessel center (works for full-height and sub-lane items)
+        new_y = master_item.pos().y() + master_item.rect().height() / 2
+        term_idx = max(0, min(int(new_y // self.row_height), len(self.terminal_list) - 1))
         snapped_y = term_idx * self.row_height + 10
         
         new_x = master_item.pos().x()
@@ -3291,11 +5494,11 @@ class BerthMonitor(QMainWindow):
         
         master_item.setPos(snapped_x, snapped_y)
         
-        # Snap Width as well
+        # Snap Width as well (full row height, sub-lane re-assigned below)
         current_width = master_item.rect().width()
         duration_hours = max(1, round(current_width / self.pixels_per_hour)) # Min 1 hour
         snapped_width = duration_hours * self.pixels_per_hour
-        master_item.setRect(0, 0, snapped_width, master_item.rect().height())
+        master_item.setRect(0, 0, snapped_width, self.row_height - 20)
         master_item.update_time_labels()
         
         old_eta = master_item.data['eta']
@@ -3321,25 +5524,62 @@ class BerthMonitor(QMainWindow):
         master_item.data['출항예정일시'] = format_date(new_etd)
         
         master_item.update_time_labels()
+        
+        # Keep the per-berth interval index up to date (move / resize)
+        self.berth_index[old_term].remove(master_item)
+        self.berth_index[new_term].add(master_item)
 
         # Update Change Sidebar TABLE (MASTER)
+        self.log_master_change(master_item)
+        port = self.ports[self.active_port_code]
+        port.cascade_origin.pop(master_item.data['uid'], None) # Placed by the user
+        port.user_placed.add(master_item.data['uid'])
+        
+        # Check if this is the first move after copy
+        if hasattr(master_item, 'is_just_copied') and master_item.is_just_copied:
+             if hasattr(master_item, 'has_moved_during_drag') and master_item.has_moved_during_drag:
+                 master_item.is_just_copied = False
+                 print("DEBUG: Flag consumed (moved).")
+             else:
+                 print("DEBUG: Flag KEPT (not moved).")
+        else:
+             self.resolve_collisions(master_item)
+             # Space may have freed up: pull pushed vessels back (old berth first)
+             if self.compaction_enabled:
+                 for berth in dict.fromkeys((old_term, new_term)):
+                     self.compact_berth(berth, master_item)
+        
+        # Re-pack / re-color only the affected berths (old + new)
+        self.pack_berth_lanes({old_term, new_term})
+        self.update_heatmap_rows({old_term, new_term})
+        self.update_auto_ts(master_item)
+        self.refresh_ts_status({old_term, new_term})
+        self.check_berth_rotations({old_term, new_term})
+        self.check_berth_cross_ts({old_term, new_term})
+             
+        self.update_table()
+
+    def log_master_change(self, master_item, data=None):
+        """Upsert / drop the MASTER log row of a vessel the user (or the optimizer) moved.
+        master_item None: a call without a VesselItem (filtered out), given as data."""
+        if master_item is not None: data = master_item.data
         # 1. Get Original Data
-        orig_data = self.get_original_data(master_item.data)
+        orig_data = self.get_original_data(data)
         
         if orig_data:
             # 2. Compare Current vs Original
             orig_term = orig_data['full_berth']
             orig_eta = orig_data['eta']
             
-            curr_term = master_item.data['full_berth']
-            curr_eta = master_item.data['eta']
+            curr_term = data['full_berth']
+            curr_eta = data['eta']
             
             # Check for ANY change
             if orig_term != curr_term or orig_eta != curr_eta:
                 # Construct Log Entry
                 # Use strict key for identification
-                log_key = f"{master_item.data['모선명']}|{master_item.data['선사항차']}"
-                vessel_display = master_item.data['모선명'] + " (" + get_display_voyage(master_item.data['선사항차']) + ")"
+                log_key = f"{data['모선명']}|{data['선사항차']}"
+                vessel_display = data['모선명'] + " (" + get_display_voyage(data['선사항차']) + ")"
                 
                 vessel_widget_text = None
                 vessel_widget_style = None
@@ -3389,101 +5629,713 @@ class BerthMonitor(QMainWindow):
                     'to_widget_text': to_widget_text,
                     'to_widget_style': to_widget_style,
                     'shift_text': delta_str,
-                    'shift_color': shift_color
+                    'shift_color': shift_color,
+                    'uid': data.get('uid') # Which call the user moved (duplicates share the key)
                 }
                 
                 
-                # Update Log List (Unique by Key)
-                self.update_log_entry(self.ports[self.active_port_code].master_log_data, log_key, entry)
+                # Update Log (Unique by Key) -> table row follows via store events
+                self.ports[self.active_port_code].master_log_data.upsert(log_key, entry)
+                self.master_table.scrollToBottom()
             else:
                 # No difference from Original -> Remove if exists
-                log_key = f"{master_item.data['모선명']}|{master_item.data['선사항차']}"
-                self.update_log_entry(self.ports[self.active_port_code].master_log_data, log_key, None)
-                
-            # Repopulate Table
-            self.repopulate_logs()
-        
-        # Check if this is the first move after copy
-        if hasattr(master_item, 'is_just_copied') and master_item.is_just_copied:
-             if hasattr(master_item, 'has_moved_during_drag') and master_item.has_moved_during_drag:
-                 master_item.is_just_copied = False
-                 print("DEBUG: Flag consumed (moved).")
-             else:
-                 print("DEBUG: Flag KEPT (not moved).")
-        else:
-             self.resolve_collisions(master_item)
-             
-        self.update_table()
+                log_key = f"{data['모선명']}|{data['선사항차']}"
+                self.ports[self.active_port_code].master_log_data.remove(log_key)
 
     def resolve_collisions(self, master_item):
-        slave_changes = []
-        terminal_vessels = [v for v in self.vessel_items if v.data['full_berth'] == master_item.data['full_berth']]
-        terminal_vessels.sort(key=lambda x: x.data['eta'])
-        
-        # Capture Initial State for Slave Logging
-        initial_state = {}
-        for v in terminal_vessels:
-            if v == master_item: continue
-            initial_state[v] = v.data['eta']
-            
-        changed = True
-        loop = 0
-        
-        while changed and loop < 50:
-            changed = False; loop += 1
-            for i in range(len(terminal_vessels) - 1):
-                v1, v2 = terminal_vessels[i], terminal_vessels[i+1]
-                safe_eta = v1.data['etd'] + timedelta(hours=self.safety_gap_h)
-                if v2.data['eta'] < safe_eta:
-                    delta = safe_eta - v2.data['eta']
-                    # old_eta = v2.data['eta'] # No longer needed for logging inside loop
-                    v2.data['eta'] += delta
-                    v2.data['etd'] += delta
-                    v2.data['접안예정일시'] = format_date(v2.data['eta'])
-                    v2.data['출항예정일시'] = format_date(v2.data['etd'])
-                    v2.setPos((v2.data['eta'] - self.start_time).total_seconds()/3600 * self.pixels_per_hour, v2.pos().y())
-                    v2.update_time_labels()
-                    
-                    changed = True
+        # One forward sweep over the maintained berth order (no fixpoint loop)
+        schedule = self.berth_index[master_item.data['full_berth']]
+        terminal_vessels = schedule.items
+        shifts = cascade_sweep([v.data['eta'] for v in terminal_vessels],
+                               [v.data['etd'] for v in terminal_vessels],
+                               timedelta(hours=self.safety_gap_h))
+        
+        # Apply geometry once per shifted vessel
+        port = self.ports[self.active_port_code]
+        for v, shift in zip(terminal_vessels, shifts):
+            if not shift: continue
+            if v is not master_item: # The master's pushed drop is still the user's placement
+                port.cascade_origin.setdefault(v.data['uid'], v.data['eta'])
+            v.data['eta'] += shift
+            v.data['etd'] += shift
+            v.data['접안예정일시'] = format_date(v.data['eta'])
+            v.data['출항예정일시'] = format_date(v.data['etd'])
+            v.setPos((v.data['eta'] - self.start_time).total_seconds()/3600 * self.pixels_per_hour, v.pos().y())
+            v.update_time_labels()
+        
+        # Shifts keep the order -> only the keys change
+        schedule.refresh_keys()
 
         # Generate Logs based on Total Shift (Original vs Current) - SLAVE
-        # Compare against ORIGINAL data for cumulative log
-        
-        current_slave_logs = self.ports[self.active_port_code].slave_log_data
-        
         for v in terminal_vessels:
             if v == master_item: continue # Skip Master (logged separately)
-            
-            orig = self.get_original_data(v.data)
-            if not orig: continue
-            
-            total_delta = v.data['eta'] - orig['eta']
-            
-            log_key = f"{v.data['모선명']}|{v.data['선사항차']}"
-            v_name = v.data['모선명'] + " (" + get_display_voyage(v.data['선사항차']) + ")"
-            
-            # If changed significantly (> 1 hr)
-            entry = None
-            if abs(total_delta.total_seconds()) >= 3600:
-                entry = {
-                     'vessel': v,
-                     'name': v_name,
-                     'old_eta': format_short_dt(orig['eta']),
-                     'new_eta': format_short_dt(v.data['eta']),
-                     'delta': total_delta,
-                     'delta_str': format_time_delta(total_delta)
-                }
-            
-            
-            # Update Log (Unique by log_key)
-            self.update_log_entry(current_slave_logs, log_key, entry)
+            self.log_slave_shift(port, v.data, v)
 
-        # Repopulate Logs (Both Master and Slave might have updated)
-        # Repopulate Logs (Both Master and Slave might have updated)
-        self.repopulate_logs()
         self.slave_table.scrollToBottom()
 
+    def compact_berth(self, berth, master_item=None):
+        """Pull-left pass over one berth. Only cascade-shifted calls move, back toward
+        where they were before the cascade: the master, copies and user placements stay."""
+        schedule = self.berth_index[berth]
+        port = self.ports[self.active_port_code]
+        origins, movable = [], []
+        for v in schedule.items:
+            origin = port.cascade_origin.get(v.data['uid'])
+            origins.append(origin if origin is not None else v.data['eta'])
+            movable.append(v is not master_item and origin is not None)
+        shifts = compaction_sweep([v.data['eta'] for v in schedule.items], [v.data['etd'] for v in schedule.items],
+                                  origins, movable, timedelta(hours=self.safety_gap_h))
+        
+        pulled = False
+        for v, shift, origin in zip(schedule.items, shifts, origins):
+            if not shift: continue
+            v.data['eta'] += shift
+            v.data['etd'] += shift
+            if v.data['eta'] <= origin: del port.cascade_origin[v.data['uid']] # Back in place
+            v.data['접안예정일시'] = format_date(v.data['eta'])
+            v.data['출항예정일시'] = format_date(v.data['etd'])
+            v.setPos((v.data['eta'] - self.start_time).total_seconds()/3600 * self.pixels_per_hour, v.pos().y())
+            v.update_time_labels()
+            self.log_slave_shift(port, v.data, v) # Same cumulative row as the cascade
+            pulled = True
+        if pulled:
+            schedule.refresh_keys() # Pulls keep the order
+        return pulled
+
+    def log_slave_shift(self, port, data, v_item=None):
+        """Upsert / drop the SLAVE log row of one call.
+        Compare against ORIGINAL data for a cumulative log."""
+        orig = self.get_original_data(data, port)
+        if not orig: return
+        
+        total_delta = data['eta'] - orig['eta']
+        log_key = f"{data['모선명']}|{data['선사항차']}"
+        v_name = data['모선명'] + " (" + get_display_voyage(data['선사항차']) + ")"
+        
+        # If changed significantly (> 1 hr)
+        entry = None
+        if abs(total_delta.total_seconds()) >= 3600:
+            entry = {
+                 'vessel': v_item,
+                 'name': v_name,
+                 'old_eta': format_short_dt(orig['eta']),
+                 'new_eta': format_short_dt(data['eta']),
+                 'delta': total_delta,
+                 'delta_str': format_time_delta(total_delta)
+            }
+        
+        # Update Log (Unique by log_key)
+        port.slave_log_data.upsert(log_key, entry)
+
+    def hours_from_start(self, t):
+        return (t - self.start_time).total_seconds() / 3600
+
+    def delay_baseline(self, data, port=None):
+        """(berth, ETA) a call's delay is measured from: where the user placed it
+        (drags, copies; before any later cascade push), else its original"""
+        port = port or self.ports[self.active_port_code]
+        if data['uid'] in port.user_placed:
+            return data['full_berth'], port.cascade_origin.get(data['uid'], data['eta'])
+        orig = self.get_original_data(data, port) or data
+        return orig['full_berth'], orig['eta']
+
+    def schedule_delay_summary(self):
+        """(total delay h vs the baseline ETA, terminal changes) of every call of the active port"""
+        delay, term_changes = 0, 0
+        for d in self.vessel_data_list:
+            berth, eta = self.delay_baseline(d)
+            delay += max(0, (d['eta'] - eta).total_seconds() / 3600)
+            if berth.split('-')[0] != d['터미널']: term_changes += 1
+        return delay, term_changes
+
+    def run_berth_optimizer(self):
+        """Snapshot every call of the active port (filtered out too, plain tuples)
+        and optimize it in the process pool"""
+        if not self.vessel_data_list or not self.vessel_items: return
+        calls = []
+        for d in self.vessel_data_list:
+            berth, eta = self.delay_baseline(d)
+            calls.append((d['uid'], berth if berth in self.terminal_list else d['full_berth'],
+                          self.hours_from_start(eta), self.hours_from_start(d['etd']) - self.hours_from_start(d['eta'])))
+        self.optimizer_term_change_h = self.term_change_spin.value()
+        task = (calls, list(self.terminal_list), self.safety_gap_h, self.optimizer_term_change_h, 20)
+        
+        code = self.active_port_code
+        self.btn_optimize.setEnabled(False)
+        self.optimizer_status_label.setText("Optimizing ...")
+        self.submit_background_job(optimize_berth_plan, task, lambda result: self.on_optimizer_done(code, result))
+
+    def on_optimizer_done(self, code, result):
+        self.btn_optimize.setEnabled(True)
+        self.optimizer_status_label.setText(f"Proposed: delay {result['delay']:.0f}H, terminal changes {result['term_changes']}")
+        if code != self.active_port_code: return # Port switched meanwhile -> plan is stale
+        self.review_berth_plan(result)
+
+    def review_berth_plan(self, result):
+        """Dialog listing the proposed changes; Apply commits them in one step"""
+        data_by_uid = {d['uid']: d for d in self.vessel_data_list}
+        changes = []
+        planned = [] # Every call as the plan leaves it (conflict count)
+        for uid, berth, start_h in result['plan']:
+            data = data_by_uid.get(uid)
+            if not data: continue
+            new_eta = self.start_time + timedelta(minutes=round(start_h * 60))
+            planned.append({'uid': uid, 'full_berth': berth, 'eta': new_eta, 'etd': new_eta + (data['etd'] - data['eta'])})
+            if berth != data['full_berth'] or new_eta != data['eta']:
+                changes.append((data, berth, new_eta))
+        
+        gap = timedelta(hours=self.safety_gap_h)
+        cur_delay, cur_terms = self.schedule_delay_summary()
+        cur_conflicts = len(find_schedule_conflicts(self.vessel_data_list, gap))
+        new_conflicts = len(find_schedule_conflicts(planned, gap))
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Berth Optimizer - Proposed Plan")
+        dialog.resize(700, 500)
+        layout = QVBoxLayout(dialog)
+        summary = QLabel(f"Current: delay {cur_delay:.0f}H, terminal changes {cur_terms}, conflicts {cur_conflicts}  →  "
+                         f"Proposed: delay {result['delay']:.0f}H, terminal changes {result['term_changes']}, conflicts {new_conflicts}  "
+                         f"({len(changes)} vessels change)")
+        summary.setWordWrap(True)
+        layout.addWidget(summary)
+        
+        table = QTableWidget(len(changes), 4)
+        table.setHorizontalHeaderLabels(["Vessel", "FROM", "TO", "Shift"])
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for r, (data, berth, new_eta) in enumerate(changes):
+            table.setItem(r, 0, QTableWidgetItem(f"{data['모선명']} ({get_display_voyage(data['선사항차'])})"))
+            table.setItem(r, 1, QTableWidgetItem(f"{data['full_berth']} {format_short_dt(data['eta'])}"))
+            to_item = QTableWidgetItem(f"{berth} {format_short_dt(new_eta)}")
+            if berth.split('-')[0] != data['터미널']:
+                to_item.setForeground(QColor("#ff5555")) # Terminal change
+            table.setItem(r, 2, to_item)
+            table.setItem(r, 3, QTableWidgetItem(format_time_delta(new_eta - data['eta'])))
+        layout.addWidget(table)
+        
+        btn_layout = QHBoxLayout()
+        btn_apply = QPushButton("APPLY PLAN")
+        btn_apply.setStyleSheet("background-color: #9ece6a; color: black; font-weight: bold;")
+        btn_apply.clicked.connect(dialog.accept)
+        btn_cancel = QPushButton("CANCEL")
+        btn_cancel.clicked.connect(dialog.reject)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_apply)
+        btn_layout.addWidget(btn_cancel)
+        layout.addLayout(btn_layout)
+        
+        if dialog.exec_() == QDialog.Accepted:
+            self.apply_berth_plan(changes)
+
+    def apply_berth_plan(self, changes):
+        """Commit [(data, berth, new_eta)] in one step (no redraw); calls that are
+        filtered out only change their data"""
+        if not changes: return
+        port = self.ports[self.active_port_code]
+        touched = set()
+        for data, berth, new_eta in changes:
+            v_item = self.vessel_item_map.get(data['uid'])
+            old_berth = data['full_berth']
+            if v_item: self.berth_index[old_berth].remove(v_item)
+            
+            duration = data['etd'] - data['eta']
+            data['eta'] = new_eta
+            data['etd'] = new_eta + duration
+            data['full_berth'] = berth
+            port.cascade_origin.pop(data['uid'], None)
+            parts = berth.split('-', 1)
+            data['터미널'] = parts[0]
+            data['선석'] = parts[1] if len(parts) > 1 else ""
+            data['접안예정일시'] = format_date(data['eta'])
+            data['출항예정일시'] = format_date(data['etd'])
+            
+            if v_item:
+                row = self.terminal_list.index(berth)
+                v_item.setPos(v_item.pos().x(), row * self.row_height + 10)
+                v_item.setRect(0, 0, v_item.rect().width(), self.row_height - 20)
+                v_item.apply_time_scale(self.start_time, self.pixels_per_hour)
+                self.berth_index[berth].add(v_item)
+            
+            # Berth moves are planner decisions (MASTER), pure time shifts are SLAVE
+            if berth != old_berth: self.log_master_change(v_item, data)
+            else: self.log_slave_shift(port, data, v_item)
+            touched.update((old_berth, berth))
+        
+        self.pack_berth_lanes(touched)
+        self.update_heatmap_rows(touched)
+        if self.edge_layer:
+            self.edge_layer.refresh_all()
+        self.refresh_ts_status(touched)
+        self.check_berth_rotations(touched)
+        self.check_berth_cross_ts(touched)
+        self.master_table.scrollToBottom()
+        self.slave_table.scrollToBottom()
+        self.update_table()
+
+    def evaluate_what_if(self, plans, callback):
+        """Evaluate candidate move plans of the active port in parallel worker processes.
+        plans: [{uid: (full_berth, new_eta)}]. callback([result per plan]) runs on the GUI
+        thread once all are done; result = {'total_delay' (h, vs the delay baseline),
+        'vessels_shifted', 'terminal_changes', 'gap_violations'} or None if it failed.
+        Every call of the port takes part (filtered out too), with the drop's compaction."""
+        port = self.ports[self.active_port_code]
+        calls = []
+        for d in self.vessel_data_list:
+            berth, eta = self.delay_baseline(d, port)
+            origin = port.cascade_origin.get(d['uid'])
+            calls.append((d['uid'], d['full_berth'], self.hours_from_start(d['eta']), self.hours_from_start(d['etd']),
+                          berth, self.hours_from_start(eta),
+                          None if origin is None else self.hours_from_start(origin)))
+        
+        results = [None] * len(plans)
+        pending = set(range(len(plans)))
+        def on_result(i, result):
+            results[i] = result
+            pending.discard(i)
+            if not pending: callback(results)
+        
+        for i, plan in enumerate(plans):
+            moves = {uid: (berth, self.hours_from_start(eta)) for uid, (berth, eta) in plan.items()}
+            self.submit_background_job(evaluate_move_plan, (calls, moves, self.safety_gap_h, self.compaction_enabled),
+                                       lambda result, i=i: on_result(i, result),
+                                       lambda e, i=i: on_result(i, None)) # Failed plan -> None
+        if not plans: callback(results)
+
+    def compare_picked_vessel(self):
+        """What-if: the picked vessel on every berth at its current ETA, and in every found free window"""
+        v_item = self.picked_vessel
+        if not v_item or v_item.scene() is not self.scene: return
+        uid = v_item.data['uid']
+        labels = []
+        plans = []
+        for berth in self.terminal_list:
+            plans.append({uid: (berth, v_item.data['eta'])})
+            labels.append(f"{berth} {format_short_dt(v_item.data['eta'])}")
+        for start_h, berth, _ in self.free_windows:
+            eta = self.start_time + timedelta(hours=start_h)
+            plans.append({uid: (berth, eta)})
+            labels.append(f"{berth} {format_short_dt(eta)} (free)")
+        self.what_if_job_seq += 1
+        seq = self.what_if_job_seq
+        self.what_if_status_label.setText(f"Evaluating {len(plans)} plans ...")
+        self.evaluate_what_if(plans, lambda results: self.show_what_if_results(seq, labels, results))
+
+    def show_what_if_results(self, seq, labels, results):
+        if seq != self.what_if_job_seq: return # A newer comparison is on its way
+        self.what_if_labels = labels
+        self.what_if_status_label.setText("")
+        self.what_if_table.setSortingEnabled(False) # Rows would move while being filled
+        self.what_if_table.setRowCount(0)
+        for label, result in zip(self.what_if_labels, results):
+            if result is None: continue
+            row = self.what_if_table.rowCount()
+            self.what_if_table.insertRow(row)
+            self.what_if_table.setItem(row, 0, QTableWidgetItem(label))
+            for col, key in enumerate(('total_delay', 'vessels_shifted', 'terminal_changes', 'gap_violations'), 1):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, round(result[key], 1) if key == 'total_delay' else result[key])
+                self.what_if_table.setItem(row, col, item)
+        self.what_if_table.setSortingEnabled(True)
+        self.what_if_table.sortItems(1) # Least delay first
+
+    def parse_delay_models(self):
+        """'KEY P_LATE MEAN_H' lines -> {key: (p_late, mean_h)} (key = route or line)"""
+        models = {}
+        for line in self.delay_model_input.toPlainText().splitlines():
+            parts = line.split()
+            if len(parts) != 3: continue
+            try:
+                models[parts[0]] = (float(parts[1]), float(parts[2]))
+            except ValueError:
+                print(f"Invalid delay model line: {line}")
+        return models
+
+    def delay_model_for(self, data, models):
+        return models.get(data.get('항로')) or models.get(data.get('선사')) or self.delay_model_default
+
+    def run_robustness(self):
+        """One Monte Carlo job per berth; badges appear as berths finish"""
+        if not self.vessel_items: return
+        models = self.parse_delay_models()
+        samples = int(self.robust_samples_spin.value())
+        threshold = self.robust_threshold_spin.value()
+        self.clear_robustness() # New run: old badges and late results of the old run go
+        seq = self.robust_job_seq
+        code = self.active_port_code
+        self.robust_pending = len(self.terminal_list)
+        self.robust_status_label.setText(f"Running {samples} samples x {self.robust_pending} berths ...")
+        for row, berth in enumerate(self.terminal_list):
+            items = self.berth_index[berth].items
+            task = ([v.data['uid'] for v in items],
+                    [self.hours_from_start(v.data['eta']) for v in items],
+                    [self.hours_from_start(v.data['etd']) for v in items],
+                    [self.delay_model_for(v.data, models) for v in items],
+                    self.safety_gap_h, samples, threshold, row)
+            self.submit_background_job(robustness_berth, task,
+                                       lambda probabilities: self.on_robustness_result(seq, code, probabilities),
+                                       lambda e: self.on_robustness_result(seq, code, {}))
+
+    def on_robustness_result(self, seq, code, probabilities):
+        if seq != self.robust_job_seq or code != self.active_port_code: return # Stale run
+        for uid, p in probabilities.items():
+            v_item = self.vessel_item_map.get(uid)
+            if v_item:
+                v_item.robustness = p
+                v_item.update()
+        self.robust_pending -= 1
+        if self.robust_pending <= 0:
+            fragile = sum(1 for v in self.vessel_items if v.robustness is not None and v.robustness >= 0.3)
+            self.robust_status_label.setText(f"Done: {fragile} vessels >= 30%")
+
+    def clear_robustness(self):
+        self.robust_job_seq += 1
+        self.robust_pending = 0
+        for v in self.vessel_items:
+            if v.robustness is not None:
+                v.robustness = None
+                v.update()
+        self.robust_status_label.setText("")
+
+    def run_queue_simulation(self):
+        """Replay the active port with random arrival delays; runs are split over the worker pool"""
+        if not self.vessel_items: return
+        models = self.parse_delay_models()
+        calls = [(v.data['full_berth'], self.hours_from_start(v.data['eta']),
+                  (v.data['etd'] - v.data['eta']).total_seconds() / 3600, self.delay_model_for(v.data, models))
+                 for v in self.vessel_items]
+        self.queue_sim_runs = int(self.queue_runs_spin.value())
+        n_jobs = min(self.queue_sim_runs, self.process_pool_workers)
+        self.queue_sim_summary = {}
+        self.queue_sim_pending = n_jobs
+        self.queue_status_label.setText(f"Simulating {self.queue_sim_runs} runs of {len(calls)} calls ...")
+        for job in range(n_jobs):
+            job_runs = self.queue_sim_runs // n_jobs + (1 if job < self.queue_sim_runs % n_jobs else 0)
+            self.submit_background_job(simulate_berth_queues, (calls, self.safety_gap_h, job_runs, job),
+                                       self.on_queue_simulation_result, lambda e: self.on_queue_simulation_result({}))
+
+    def on_queue_simulation_result(self, summary):
+        """Merge one job's wait summary; once all are in, fill the per-terminal distribution table"""
+        for term, term_summary in summary.items():
+            if term in self.queue_sim_summary:
+                merge_wait_summary(self.queue_sim_summary[term], term_summary)
+            else:
+                self.queue_sim_summary[term] = term_summary
+        self.queue_sim_pending -= 1
+        if self.queue_sim_pending > 0: return
+        
+        runs = self.queue_sim_runs
+        self.queue_table.setRowCount(0)
+        for term in sorted(self.queue_sim_summary):
+            s = self.queue_sim_summary[term]
+            n = s['n']
+            row = self.queue_table.rowCount()
+            self.queue_table.insertRow(row)
+            values = [term, round(n / runs),
+                      f"{s['sum'] / n:.1f}h",
+                      f"{wait_percentile(s, 0.5):.1f}h",
+                      f"{wait_percentile(s, 0.9):.1f}h",
+                      f"{s['max']:.1f}h",
+                      f"{100 * s['waiting'] / n:.0f}%"]
+            for col, value in enumerate(values):
+                self.queue_table.setItem(row, col, QTableWidgetItem(str(value)))
+        self.queue_status_label.setText(f"Done: {runs} runs")
+
+    def run_cascade_sensitivity(self):
+        """Per vessel of the active port: calls / hours shifted downstream if it runs 1, 6 or 12h late"""
+        self.sensitivity = {}
+        for berth in self.terminal_list:
+            items = self.berth_index[berth].items
+            if not items: continue
+            impact = cascade_sensitivity([self.hours_from_start(v.data['eta']) for v in items],
+                                         [self.hours_from_start(v.data['etd']) for v in items],
+                                         self.safety_gap_h, self.sensitivity_delays)
+            for v, row in zip(items, impact):
+                self.sensitivity[v.data['uid']] = row
+        
+        self.sens_table.setSortingEnabled(False) # Rows would move while being filled
+        self.sens_table.setRowCount(0)
+        for uid, impact in self.sensitivity.items():
+            data = self.vessel_item_map[uid].data
+            row = self.sens_table.rowCount()
+            self.sens_table.insertRow(row)
+            name_item = QTableWidgetItem(f"{data['모선명']} {get_display_voyage(data['선사항차'])}")
+            name_item.setData(Qt.UserRole, uid)
+            self.sens_table.setItem(row, 0, name_item)
+            self.sens_table.setItem(row, 1, QTableWidgetItem(data['full_berth']))
+            for t, (count, hours) in enumerate(impact):
+                count_item = QTableWidgetItem()
+                count_item.setData(Qt.DisplayRole, count)
+                hours_item = QTableWidgetItem()
+                hours_item.setData(Qt.DisplayRole, round(hours, 1))
+                self.sens_table.setItem(row, 2 + 2 * t, count_item)
+                self.sens_table.setItem(row, 3 + 2 * t, hours_item)
+        self.sens_table.setSortingEnabled(True)
+        self.sens_table.sortItems(3 + 2 * self.sensitivity_overlay, Qt.DescendingOrder)
+        self.apply_sensitivity_overlay()
+
+    def apply_sensitivity_overlay(self):
+        """Tint vessels by shifted hours at the chosen delay: yellow <= delay, orange <= 3x, red beyond"""
+        delay = self.sensitivity_delays[self.sensitivity_overlay]
+        fragile = 0
+        for v in self.vessel_items:
+            impact = self.sensitivity.get(v.data['uid'])
+            color = None
+            if impact and impact[self.sensitivity_overlay][1] > 0:
+                hours = impact[self.sensitivity_overlay][1]
+                color = QColor("#f1fa8c" if hours <= delay else ("#ffb86c" if hours <= 3 * delay else "#ff5555"))
+                color.setAlpha(120)
+                if hours > 3 * delay: fragile += 1
+            if v.sensitivity_color != color:
+                v.sensitivity_color = color
+                v.update()
+        if self.sensitivity:
+            self.sens_status_label.setText(f"{len(self.sensitivity)} vessels, {fragile} push more than {3 * delay}h at +{delay}h")
+
+    def on_sensitivity_overlay_changed(self, idx):
+        self.sensitivity_overlay = idx
+        self.apply_sensitivity_overlay()
+
+    def clear_cascade_sensitivity(self):
+        self.sensitivity = {}
+        self.sens_table.setRowCount(0)
+        self.apply_sensitivity_overlay()
+        self.sens_status_label.setText("")
+
+    def focus_sensitivity_row(self, row, col):
+        item = self.sens_table.item(row, 0)
+        v_item = self.vessel_item_map.get(item.data(Qt.UserRole)) if item else None
+        if v_item:
+            self.gv.centerOn(v_item)
+            self.set_picked_vessel(v_item)
+
+    def focus_conflict(self, row, col):
+        """Switch to the conflict's port and center on the later call"""
+        if row >= len(self.schedule_conflicts): return
+        code, _, _, later, _, _ = self.schedule_conflicts[row]
+        if code != self.active_port_code:
+            self.port_tabs.setCurrentIndex(list(self.port_views).index(code))
+        v_item = self.vessel_item_map.get(later.get('uid'))
+        if v_item:
+            self.gv.centerOn(v_item)
+
+    def check_all_ports(self):
+        """Report every overlap / safety-gap violation of every port"""
+        gap = timedelta(hours=self.safety_gap_h)
+        self.schedule_conflicts = []
+        for code, port in self.ports.items():
+            for berth, earlier, later, kind, hours in find_schedule_conflicts(port.vessel_data_list, gap):
+                self.schedule_conflicts.append((code, berth, earlier, later, kind, hours))
+        
+        self.conflict_table.setRowCount(0)
+        for code, berth, earlier, later, kind, hours in self.schedule_conflicts:
+            row = self.conflict_table.rowCount()
+            self.conflict_table.insertRow(row)
+            self.conflict_table.setItem(row, 0, QTableWidgetItem(code))
+            self.conflict_table.setItem(row, 1, QTableWidgetItem(berth))
+            self.conflict_table.setItem(row, 2, QTableWidgetItem(f"{earlier['모선명']} → {later['모선명']}"))
+            issue_item = QTableWidgetItem(f"{kind} {hours:.1f}H")
+            issue_item.setForeground(QColor("#ff5555" if kind == 'OVERLAP' else "#ffb86c"))
+            self.conflict_table.setItem(row, 3, issue_item)
+        self.conflict_summary_label.setText(f"Conflicts: {len(self.schedule_conflicts)} "
+                                            f"({sum(1 for c in self.schedule_conflicts if c[4] == 'OVERLAP')} overlaps)")
+
+    def schedule_rotation_chains(self):
+        """Join every port's calls on normalized name + ship voyage (모선항차, present in
+        every port's format) in a worker process"""
+        # Plain datetimes: the join only orders calls (the chart's start_time may not exist yet)
+        task = {code: [(d['uid'], d['모선명'], d.get('모선항차') or d['선사항차'], d['eta'])
+                       for d in port.vessel_data_list]
+                for code, port in self.ports.items() if port.vessel_data_list}
+        self.rotation_job_seq += 1
+        seq = self.rotation_job_seq
+        self.rotation_status_label.setText("Building rotation chains ...")
+        self.submit_background_job(build_rotation_chains, task,
+                                   lambda chains: self.on_rotation_chains(seq, chains))
+
+    def on_rotation_chains(self, seq, chains):
+        if seq != self.rotation_job_seq: return # A newer paste is on its way
+        data_by_key = {(code, d['uid']): d for code, port in self.ports.items() for d in port.vessel_data_list}
+        self.rotation_chains = []
+        self.rotation_by_uid = {}
+        for chain in chains:
+            calls = [(code, data_by_key[(code, uid)]) for code, uid in chain if (code, uid) in data_by_key]
+            if len(calls) < 2: continue # Re-pasted meanwhile
+            for code, d in calls:
+                self.rotation_by_uid[(code, d['uid'])] = len(self.rotation_chains)
+            self.rotation_chains.append(calls)
+        self.evaluate_rotations()
+
+    def evaluate_rotations(self, chain_ids=None):
+        """Propagate lateness along the rotations (all, or only `chain_ids`) and refresh the table"""
+        transit = timedelta(hours=self.transit_spin.value())
+        if chain_ids is None:
+            self.rotation_issues = {}
+            chain_ids = range(len(self.rotation_chains))
+        for idx in chain_ids:
+            chain = self.rotation_chains[idx]
+            delays = rotation_delays([(code, d['eta'], d['etd']) for code, d in chain], transit)
+            hours = [delay.total_seconds() / 3600 for delay in delays]
+            if any(hours): self.rotation_issues[idx] = hours
+            else: self.rotation_issues.pop(idx, None)
+        self.refresh_rotation_table()
+
+    def check_berth_rotations(self, berths):
+        """After a move: re-evaluate only the rotations of vessels on the touched berths"""
+        code = self.active_port_code
+        chain_ids = {self.rotation_by_uid[(code, v.data['uid'])] for berth in berths
+                     for v in self.berth_index[berth].items if (code, v.data['uid']) in self.rotation_by_uid}
+        if chain_ids:
+            self.evaluate_rotations(chain_ids)
+
+    def refresh_rotation_table(self):
+        self.rotation_table.setRowCount(0)
+        self.rotation_rows = []
+        for idx, hours in sorted(self.rotation_issues.items(), key=lambda kv: -sum(kv[1])):
+            chain = self.rotation_chains[idx]
+            first = next(i for i, h in enumerate(hours) if h > 0)
+            late_code, late = chain[first]
+            downstream = sum(1 for h in hours[first:] if h > 0)
+            row = self.rotation_table.rowCount()
+            self.rotation_table.insertRow(row)
+            self.rotation_table.setItem(row, 0, QTableWidgetItem(f"{late['모선명']} {get_display_voyage(late['선사항차'])}"))
+            self.rotation_table.setItem(row, 1, QTableWidgetItem(f"{chain[first - 1][0]} → {late_code}"))
+            late_item = QTableWidgetItem(f"{hours[first]:.1f}")
+            late_item.setForeground(QColor("#ff5555"))
+            self.rotation_table.setItem(row, 2, late_item)
+            self.rotation_table.setItem(row, 3, QTableWidgetItem(f"{downstream} calls / {sum(hours):.1f}H"))
+            self.rotation_rows.append((late_code, late))
+        self.rotation_status_label.setText(f"Rotations: {len(self.rotation_chains)} across ports, "
+                                           f"{len(self.rotation_issues)} with knock-on delay")
+
+    def focus_rotation_row(self, row, col):
+        """Switch to the port of the first late call and center on it"""
+        if row >= len(self.rotation_rows): return
+        code, data = self.rotation_rows[row]
+        if code != self.active_port_code:
+            self.port_tabs.setCurrentIndex(list(self.port_views).index(code))
+        v_item = self.vessel_item_map.get(data.get('uid'))
+        if v_item:
+            self.gv.centerOn(v_item)
+
+    def run_cross_port_ts(self):
+        """TS pairs between ports: one interval join over every port's calls, the discharged
+        cargo reaching the loading port after the port-to-port transit time"""
+        rules = self.parse_ts_rules()
+        if not rules: return
+        dwell = timedelta(hours=self.ts_dwell_spin.value())
+        transit = timedelta(hours=self.transit_spin.value())
+        port_of = {d['uid']: (code, d) for code, port in self.ports.items() for d in port.vessel_data_list}
+        calls = [d for _, d in port_of.values()]
+        pairs = find_ts_pairs(calls, calls, rules, dwell, transit)
+        self.cross_ts_links = [(port_of[a], port_of[b]) for a, b in pairs if port_of[a][0] != port_of[b][0]]
+        self.cross_ts_links.sort(key=lambda link: (link[1][0], link[1][1]['eta']))
+        self.cross_ts_uids = {d['uid'] for link in self.cross_ts_links for _, d in link}
+        self.refresh_cross_ts_table()
+
+    def refresh_cross_ts_table(self):
+        """Re-classify every cross-port link (cargo shifted by the transit time); missed links first"""
+        transit = timedelta(hours=self.transit_spin.value())
+        status_text = {"#00ff00": "ON TIME", "#0088ff": "YARD", "#ff0000": "MISSED"}
+        rows = []
+        for link in self.cross_ts_links:
+            (_, a), (_, b) = link
+            color = ts_status_color(a['eta'] + transit, a['etd'] + transit, b['eta'], b['etd'])
+            rows.append((ts_color_priority(color), link, color))
+        rows.sort(key=lambda row: row[0])
+        
+        self.cross_table.setRowCount(0)
+        self.cross_rows = []
+        for _, ((a_code, a), (b_code, b)), color in rows:
+            row = self.cross_table.rowCount()
+            self.cross_table.insertRow(row)
+            self.cross_table.setItem(row, 0, QTableWidgetItem(f"{a_code} {a['모선명']} ({get_display_voyage(a['선사항차'])})"))
+            self.cross_table.setItem(row, 1, QTableWidgetItem(f"{b_code} {b['모선명']} ({get_display_voyage(b['선사항차'])})"))
+            status_item = QTableWidgetItem(status_text[color.name()])
+            status_item.setForeground(color)
+            self.cross_table.setItem(row, 2, status_item)
+            self.cross_rows.append((b_code, b))
+        missed = sum(1 for priority, _, _ in rows if priority == 0)
+        self.cross_status_label.setText(f"{len(rows)} cross-port links, {missed} missed" if rows else "")
+
+    def check_berth_cross_ts(self, berths):
+        """After a move: refresh the cross-port links only if a vessel on the touched berths has one"""
+        if not self.cross_ts_uids: return
+        if any(v.data['uid'] in self.cross_ts_uids for berth in berths for v in self.berth_index[berth].items):
+            self.refresh_cross_ts_table()
+
+    def clear_cross_port_ts(self):
+        self.cross_ts_links = []
+        self.cross_ts_uids = set()
+        self.refresh_cross_ts_table()
+
+    def drop_cross_port_ts(self, code, uids=None):
+        """A port's calls were replaced (paste / reset): its links point at old data.
+        uids: only these calls of the port left (Live Horizon archive)."""
+        if not self.cross_ts_links: return
+        def is_dropped(c, d): return c == code and (uids is None or d['uid'] in uids)
+        links = [link for link in self.cross_ts_links if not any(is_dropped(c, d) for c, d in link)]
+        if len(links) == len(self.cross_ts_links): return
+        self.cross_ts_links = links
+        self.cross_ts_uids = {d['uid'] for link in self.cross_ts_links for _, d in link}
+        self.refresh_cross_ts_table()
+
+    def focus_cross_ts_row(self, row, col):
+        """Switch to the loading vessel's port and center on it"""
+        if row >= len(self.cross_rows): return
+        code, data = self.cross_rows[row]
+        if code != self.active_port_code:
+            self.port_tabs.setCurrentIndex(list(self.port_views).index(code))
+        v_item = self.vessel_item_map.get(data.get('uid'))
+        if v_item:
+            self.gv.centerOn(v_item)
+
+    def repair_all_ports(self):
+        """One cascade sweep per berth of every port; shifts go to each port's SLAVE log"""
+        gap = timedelta(hours=self.safety_gap_h)
+        repaired = 0
+        touched_ports = set()
+        for code, port in self.ports.items():
+            by_berth = defaultdict(list)
+            for d in port.vessel_data_list:
+                by_berth[d['full_berth']].append(d)
+            items = self.vessel_item_map if code == self.active_port_code else {}
+            for berth_calls in by_berth.values():
+                berth_calls.sort(key=lambda d: (d['eta'], d.get('uid', 0)))
+                shifts = cascade_sweep([d['eta'] for d in berth_calls], [d['etd'] for d in berth_calls], gap)
+                for d, shift in zip(berth_calls, shifts):
+                    if not shift: continue
+                    port.cascade_origin.setdefault(d['uid'], d['eta'])
+                    d['eta'] += shift
+                    d['etd'] += shift
+                    d['접안예정일시'] = format_date(d['eta'])
+                    d['출항예정일시'] = format_date(d['etd'])
+                    self.log_slave_shift(port, d, items.get(d.get('uid')))
+                    repaired += 1
+                    touched_ports.add(code)
+        
+        # Ports not on screen: re-color their stored TS links (drawn on the next switch)
+        for code in touched_ports - {self.active_port_code}:
+            self.reclassify_port_ts(self.ports[code])
+        
+        # Active port: re-position the existing items (no redraw)
+        if repaired and self.vessel_items:
+            for item in self.vessel_items:
+                item.apply_time_scale(self.start_time, self.pixels_per_hour)
+            for index in self.berth_index.values():
+                index.refresh_keys()
+            self.pack_berth_lanes()
+            self.update_heatmap_rows(self.terminal_list)
+            if self.edge_layer:
+                self.edge_layer.refresh_all()
+            self.refresh_ts_status(self.terminal_list)
+            self.update_table()
+        self.slave_table.scrollToBottom()
+        self.check_all_ports()
+        self.conflict_summary_label.setText(f"Repaired: {repaired} calls shifted | {self.conflict_summary_label.text()}")
+        self.evaluate_rotations() # Other ports' calls moved too
+        self.refresh_cross_ts_table()
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Worker processes in the pyinstaller -F build
     app = QApplication(sys.argv)
     window = BerthMonitor()
     window.showFullScreen()